@@ -9,21 +9,27 @@ from routing.users import router as user_routing
 from routing.roles import router as role_routing
 from routing.patients import router as patients_routing
 from routing.documents import router as documents_routing
+from routing.uploads import router as uploads_routing
 from auth.auth import router as auth_router, get_current_user
 from routing.analitics import router as analitics_routing
 from config import settings
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from metrics.metrics import REQUEST_COUNT, HTTP_ERRORS, API_RESPONSE_TIME, get_metrics
-from tasks.tasks import start_metrics_task
+from tasks.tasks import scheduler
+from cache.local import invalidation_bus
+from db.db import UnitOfWork, current_unit_of_work
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     redis = aioredis.from_url(settings.redis_url, encoding="utf8", decode_responses=True)
     FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
-    start_metrics_task()
+    invalidation_bus.start(redis)
+    if settings.background_jobs.enabled:
+        scheduler.start(redis)
     yield
-    await FastAPICache.clear()
+    await scheduler.stop()
+    await invalidation_bus.stop()
 
 app = FastAPI(
     lifespan=lifespan,
@@ -38,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Upload-Offset"],
 )
 
 app.add_middleware(PrometheusMiddleware)
@@ -79,6 +86,24 @@ async def metrics_middleware(request: Request, call_next):
                 status_code=status_code
             ).inc()
 
+@app.middleware("http")
+async def unit_of_work_middleware(request: Request, call_next):
+    uow = UnitOfWork()
+    token = current_unit_of_work.set(uow)
+    try:
+        response = await call_next(request)
+        if response.status_code < 400:
+            await uow.commit()
+        else:
+            await uow.rollback()
+        return response
+    except Exception:
+        await uow.rollback()
+        raise
+    finally:
+        await uow.close()
+        current_unit_of_work.reset(token)
+
 protected_router = APIRouter(
     prefix=settings.api_v1_prefix,
     dependencies=[Depends(get_current_user)],
@@ -88,6 +113,7 @@ protected_router.include_router(user_routing)
 protected_router.include_router(role_routing)
 protected_router.include_router(patients_routing)
 protected_router.include_router(documents_routing)
+protected_router.include_router(uploads_routing)
 protected_router.include_router(analitics_routing)
 
 app.include_router(protected_router)
@@ -10,10 +10,18 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 
+from db.db import unit_of_work
 from depends import get_user_service, get_role_service
 from services.users import UserService
 from services.roles import RoleService
-from .utils import validate_password, encode_jwt, decode_jwt, hash_password
+from .utils import (
+    validate_password_async,
+    encode_jwt,
+    decode_jwt,
+    needs_rehash,
+    PasswordHashingBusy,
+)
+from .cache import principal_cache
 from models.models import User
 from .schema import *
 
@@ -39,13 +47,22 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await user_service.get_object_by_login(payload.get("sub"))
+    user = principal_cache.get(payload)
+    if user:
+        return user
+
+    generation = principal_cache.generation
+    # отдельная короткая сессия: иначе соединение единицы работы запроса
+    # удерживалось бы всё время приёма тела (загрузка файлов частями)
+    async with unit_of_work():
+        user = await user_service.get_object_by_login(payload.get("sub"))
 
     if not user or not user.active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User inactive or deleted",
         )
+    principal_cache.set(payload, user, generation)
     return user
 
 @router.post("/register", status_code=201)
@@ -66,7 +83,14 @@ async def register(
             detail="Данной Роли не существует",
         )
 
-    user = await user_service.create_object(user_data)
+    try:
+        user = await user_service.create_object(user_data)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
     return user.id    
     
     user = await User.create(
@@ -83,7 +107,18 @@ async def login(
 ):
     user = await user_service.get_object_by_login(form_data.username)
     
-    if not user or not validate_password(form_data.password, user.password):
+    try:
+        valid = user is not None and await validate_password_async(form_data.password, user.password)
+        if valid and needs_rehash(user.password):
+            await user_service.rehash_password(user, form_data.password)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -138,7 +173,11 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await user_service.get_object_by_login(payload.get("sub"))
+    generation = principal_cache.generation
+    # отдельная короткая сессия: иначе соединение единицы работы запроса
+    # удерживалось бы всё время приёма тела (загрузка файлов частями)
+    async with unit_of_work():
+        user = await user_service.get_object_by_login(payload.get("sub"))
     if not user or not user.active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,75 @@
+"""
+Нагрузочная оценка проверки паролей: пропускная способность входов и
+задержка event loop для остальных запросов во время всплеска логинов.
+inline - bcrypt прямо в обработчике, executor - через пул run_in_password_executor.
+
+    python -m auth.benchmark --logins 200 --concurrency 50 --rounds 12
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from config import settings
+from .utils import PasswordHashingBusy, hash_password, validate_password, validate_password_async
+
+PASSWORD = "benchmark-password"
+
+
+async def probe(stop: asyncio.Event, interval: float, lags: List[float]) -> None:
+    """Имитация постороннего запроса: насколько позже срока просыпается короткий sleep"""
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start_time - interval)
+
+
+async def burst(mode: str, hashed: bytes, logins: int, concurrency: int, interval: float):
+    slots = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with slots:
+            if mode == "inline":
+                validate_password(PASSWORD, hashed)
+                await asyncio.sleep(0)
+                return
+            try:
+                await validate_password_async(PASSWORD, hashed)
+            except PasswordHashingBusy:
+                rejected += 1
+
+    stop = asyncio.Event()
+    lags: List[float] = []
+    probe_task = asyncio.create_task(probe(stop, interval, lags))
+    start_time = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start_time
+    stop.set()
+    await probe_task
+    return elapsed, rejected, sorted(lags) or [0.0]
+
+
+async def main(args) -> None:
+    hashed = hash_password(PASSWORD, rounds=args.rounds)
+    print(f"{'mode':<10}{'logins/s':>10}{'rejected':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for mode in ("inline", "executor"):
+        elapsed, rejected, lags = await burst(mode, hashed, args.logins, args.concurrency, args.interval)
+        print(
+            f"{mode:<10}"
+            f"{(args.logins - rejected) / elapsed:>10.1f}"
+            f"{rejected:>10}"
+            f"{lags[len(lags) // 2] * 1000:>12.1f}"
+            f"{lags[min(int(len(lags) * 0.99), len(lags) - 1)] * 1000:>12.1f}"
+            f"{lags[-1] * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure login throughput and event loop lag during a login burst")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=settings.password_hashing.bcrypt_rounds)
+    parser.add_argument("--interval", type=float, default=0.01, help="probe sleep interval, seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+import time
+from typing import Dict, Optional
+
+from cache.local import LocalCache, invalidation_bus
+from config import settings
+from models.models import User
+
+
+class PrincipalCache:
+    """
+    Кэш аутентифицированных пользователей по jti токена.
+    Изменение или удаление пользователя (через invalidation_bus)
+    увеличивает его эпоху, и все закэшированные записи становятся недействительными.
+    Поколение считает все инвалидации пользователей: его читают до загрузки
+    пользователя из БД, чтобы не закэшировать строку, изменённую во время загрузки.
+    """
+
+    def __init__(self, ttl: int = settings.principal_cache_ttl):
+        self.ttl = ttl
+        self.entries = LocalCache(ttl=ttl)
+        self.epochs: Dict[int, int] = {}
+        self.generation = 0
+
+    @staticmethod
+    def key_for(payload: dict) -> str:
+        return payload.get("jti") or f"{payload.get('sub')}:{payload.get('iat')}"
+
+    def get(self, payload: dict) -> Optional[User]:
+        entry = self.entries.get(self.key_for(payload))
+        if entry is None:
+            return None
+        user, epoch = entry
+        if self.epochs.get(user.id, 0) != epoch:
+            self.entries.delete(self.key_for(payload))
+            return None
+        return user
+
+    def set(self, payload: dict, user: User, generation: int) -> None:
+        if generation != self.generation:
+            return
+        ttl = self.ttl
+        if payload.get("exp"):
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            self.entries.set(self.key_for(payload), (user, self.epochs.get(user.id, 0)), ttl=ttl)
+
+    def invalidate(self, resource: str, obj_id: int) -> None:
+        if resource == "users":
+            self.epochs[obj_id] = self.epochs.get(obj_id, 0) + 1
+            self.generation += 1
+
+
+principal_cache = PrincipalCache()
+invalidation_bus.add_listener(principal_cache.invalidate)
@@ -0,0 +1,73 @@
+import hashlib
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from config import settings
+
+
+def key_id(public_key) -> str:
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return hashlib.sha256(der).hexdigest()[:16]
+
+
+class KeySet:
+    """
+    Ключи подписи JWT, загруженные один раз.
+    Подпись - активным приватным ключом, проверка - по kid из заголовка
+    среди всех публичных ключей jwt-public*.pem (для ротации ключей).
+    """
+
+    def __init__(self, private_key_path: Path, public_key_path: Path):
+        self.private_key = serialization.load_pem_private_key(private_key_path.read_bytes(), password=None)
+        self.kid = key_id(self.private_key.public_key())
+        self.public_keys: Dict[str, object] = {self.kid: self.private_key.public_key()}
+        for path in sorted(public_key_path.parent.glob("jwt-public*.pem")):
+            public_key = serialization.load_pem_public_key(path.read_bytes())
+            self.public_keys.setdefault(key_id(public_key), public_key)
+
+    def public_key_for(self, token: str | bytes):
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            return self.public_keys[self.kid]
+        try:
+            return self.public_keys[kid]
+        except KeyError:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+
+
+class VerifiedTokenCache:
+    """LRU уже проверенных токенов; запись живёт не дольше срока действия токена"""
+
+    def __init__(self, max_entries: int = settings.auth_jwt.verified_token_cache_size):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str | bytes, dict]" = OrderedDict()
+
+    def get(self, token: str | bytes) -> Optional[dict]:
+        payload = self.entries.get(token)
+        if payload is None:
+            return None
+        if payload.get("exp", 0) <= time.time():
+            del self.entries[token]
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        self.entries.move_to_end(token)
+        return dict(payload)
+
+    def set(self, token: str | bytes, payload: dict) -> None:
+        if "exp" not in payload:
+            return
+        self.entries[token] = payload
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+key_set = KeySet(settings.auth_jwt.private_key_path, settings.auth_jwt.public_key_path)
+verified_tokens = VerifiedTokenCache()
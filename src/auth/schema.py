@@ -1,5 +1,4 @@
-from pydantic import BaseModel, validator
-import bcrypt
+from pydantic import BaseModel
 
 class BaseUser(BaseModel):
     login: str
@@ -15,10 +14,4 @@ class UserLogin(BaseUser):
 
 class UserRegister(BaseUser):
     fio: str
-    role_id: int
-    
-    @validator('password')
-    def hash_password(cls, password: str) -> bytes:
-        salt = bcrypt.gensalt()
-        pwd_bytes: bytes = password.encode()
-        return bcrypt.hashpw(pwd_bytes, salt)
\ No newline at end of file
+    role_id: int
\ No newline at end of file
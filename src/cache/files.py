@@ -0,0 +1,116 @@
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from metrics.metrics import DOWNLOAD_CACHE_REQUESTS, DOWNLOAD_CACHE_EVICTIONS, DOWNLOAD_CACHE_BYTES
+from storage.utils import read_handle_range
+
+
+class FileCache:
+    """
+    Локальный дисковый LRU-кэш содержимого документов.
+    Ключи контентно-адресуемые (sha256), поэтому записи не устаревают
+    и удаляются только при вытеснении.
+
+    Каталог общий для всех воркеров и является единственным источником
+    истины: наличие записи проверяется открытием файла, занятый объём
+    считается по каталогу, порядок вытеснения - по времени доступа.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_object_size: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_object_size = max_object_size
+        self.tmp_dir = self.root / "tmp"
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.evict()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key
+
+    def cacheable(self, size: Optional[int]) -> bool:
+        return size is not None and size <= self.max_object_size
+
+    def evict(self) -> None:
+        files = []
+        total_bytes = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_atime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+        for _, size, path in sorted(files):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                DOWNLOAD_CACHE_EVICTIONS.inc()
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        DOWNLOAD_CACHE_BYTES.set(total_bytes)
+
+    def open(
+        self,
+        key: str,
+        size: Optional[int],
+        source: AsyncIterator[bytes],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Отдаёт содержимое из кэша; при промахе полный запрос читается
+        из источника с одновременной записью в кэш.
+        """
+        if not self.cacheable(size):
+            DOWNLOAD_CACHE_REQUESTS.labels(result="bypass").inc()
+            return source
+        return self.read(key, source, start, end)
+
+    async def read(
+        self,
+        key: str,
+        source: AsyncIterator[bytes],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        path = self.path_for(key)
+        try:
+            # открытый дескриптор переживает вытеснение файла другим воркером
+            handle = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError:
+            DOWNLOAD_CACHE_REQUESTS.labels(result="miss").inc()
+            stream = self.populate(key, source) if start == 0 and end is None else source
+            async for chunk in stream:
+                yield chunk
+            return
+
+        DOWNLOAD_CACHE_REQUESTS.labels(result="hit").inc()
+        try:
+            await asyncio.to_thread(os.utime, path)
+        except OSError:
+            pass
+        async for chunk in read_handle_range(handle, start, end):
+            yield chunk
+
+    async def populate(self, key: str, source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        tmp_path = self.tmp_dir / uuid.uuid4().hex
+        handle = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in source:
+                await asyncio.to_thread(handle.write, chunk)
+                yield chunk
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(os.replace, tmp_path, self.path_for(key))
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(self.evict)
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+from config import settings, logger
+
+_MISSING = object()
+
+
+class LocalCache:
+    """In-process LRU с TTL, стоящий перед Redis"""
+
+    def __init__(self, max_entries: int = settings.local_cache_max_entries, ttl: float = settings.local_cache_ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+class InvalidationBus:
+    """
+    Рассылка инвалидаций между воркерами через Redis pub/sub.
+    Каждый воркер сбрасывает у себя локальную версию объекта
+    и вызывает зарегистрированные обработчики.
+    """
+
+    def __init__(self, cache: LocalCache, channel: str = settings.cache_invalidation_channel):
+        self.cache = cache
+        self.channel = channel
+        self.listeners: List[Callable[[str, int], None]] = []
+        self.redis = None
+        self.task: Optional[asyncio.Task] = None
+        self.generation = 0
+
+    def add_listener(self, listener: Callable[[str, int], None]) -> None:
+        self.listeners.append(listener)
+
+    def apply(self, resource: str, obj_id: int) -> None:
+        self.generation += 1
+        self.cache.delete(("version", resource, obj_id))
+        for listener in self.listeners:
+            try:
+                listener(resource, obj_id)
+            except Exception as e:
+                logger.error(f"Invalidation listener error: {e}")
+
+    async def publish(self, resource: str, obj_id: int) -> None:
+        self.apply(resource, obj_id)
+        if self.redis is not None:
+            await self.redis.publish(self.channel, json.dumps({"resource": resource, "id": obj_id}))
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    self.apply(payload["resource"], int(payload["id"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation subscriber error: {e}")
+                self.generation += 1
+                self.cache.clear()
+                await asyncio.sleep(1)
+
+    def start(self, redis) -> None:
+        self.redis = redis
+        self.task = asyncio.create_task(self.listen())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+
+local_cache = LocalCache()
+invalidation_bus = InvalidationBus(local_cache)
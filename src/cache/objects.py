@@ -0,0 +1,97 @@
+from typing import Any, Iterable, Optional, Tuple, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache import FastAPICache
+from pydantic import BaseModel
+
+from config import settings, logger
+from .local import local_cache, invalidation_bus
+from .utils import TaggedCoder
+
+
+class ObjectCache:
+    """
+    Двухуровневый кэш объектов по id с версионированными ключами.
+
+    Ключ значения содержит версию объекта, которая увеличивается после
+    каждой записи. Чтение, начавшееся до изменения, может сохранить
+    устаревшее значение только под старой версией, которую уже никто
+    не читает, поэтому TTL можно делать большим.
+
+    Версии и значения дополнительно держатся в памяти процесса
+    (cache.local); при записи версия сбрасывается во всех воркерах
+    через Redis pub/sub.
+    """
+
+    coder = TaggedCoder
+
+    def __init__(self, resource: str, schema: Type[BaseModel], expire: int = settings.object_cache_ttl):
+        self.resource = resource
+        self.schema = schema
+        self.expire = expire
+
+    def version_key(self, obj_id: int) -> str:
+        return f"object-version:{self.resource}:{obj_id}"
+
+    def value_key(self, obj_id: int, version: int) -> str:
+        return f"{FastAPICache.get_prefix()}:objects:{self.resource}:{obj_id}:v{version}"
+
+    @property
+    def redis(self):
+        return FastAPICache.get_backend().redis
+
+    async def get(self, obj_id: int) -> Tuple[Optional[int], Any]:
+        local_version = local_cache.get(("version", self.resource, obj_id))
+        if local_version is not None:
+            cached = local_cache.get(self.value_key(obj_id, local_version))
+            if cached is not None:
+                return local_version, cached
+
+        generation = invalidation_bus.generation
+        try:
+            version = int(await self.redis.get(self.version_key(obj_id)) or 0)
+            cached = await self.redis.get(self.value_key(obj_id, version))
+        except Exception as e:
+            logger.warning(f"Object cache read error ({self.resource}:{obj_id}): {e}")
+            return None, None
+
+        if generation == invalidation_bus.generation:
+            local_cache.set(("version", self.resource, obj_id), version)
+        if cached is None:
+            return version, None
+        value = self.coder.decode(cached)
+        local_cache.set(self.value_key(obj_id, version), value)
+        return version, value
+
+    async def set(self, obj_id: int, version: Optional[int], obj: Any) -> None:
+        if version is None:
+            return
+        try:
+            value = jsonable_encoder(self.schema.model_validate(obj))
+            await self.redis.set(self.value_key(obj_id, version), self.coder.encode(value), ex=self.expire)
+            local_cache.set(self.value_key(obj_id, version), value)
+        except Exception as e:
+            logger.warning(f"Object cache write error ({self.resource}:{obj_id}): {e}")
+
+    async def invalidate(self, obj_id: int) -> Optional[int]:
+        try:
+            version = int(await self.redis.incr(self.version_key(obj_id)))
+            await invalidation_bus.publish(self.resource, obj_id)
+            return version
+        except Exception as e:
+            logger.error(f"Object cache invalidation error ({self.resource}:{obj_id}): {e}")
+            invalidation_bus.apply(self.resource, obj_id)
+            return None
+
+    async def invalidate_many(self, obj_ids: Iterable[int]) -> None:
+        for obj_id in obj_ids:
+            await self.invalidate(obj_id)
+
+    async def write_through(self, obj: Any) -> None:
+        """
+        Вызывается после коммита записи. Только увеличивает версию: колбэки
+        параллельных записей могут завершиться не в порядке коммитов, и значение
+        более старой строки оказалось бы под новейшей версией. Кэш заполнит
+        следующее чтение из БД.
+        """
+        await self.invalidate(obj.id)
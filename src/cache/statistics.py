@@ -0,0 +1,64 @@
+import json
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi_cache import FastAPICache
+
+from config import settings, logger
+
+
+class BucketCache:
+    """
+    Кэш завершённых интервалов статистики.
+    Прошедшие интервалы меняются только при изменении или удалении документов,
+    поэтому такие операции увеличивают версию, а не перебирают ключи.
+    """
+
+    def __init__(self, name: str, expire: int = settings.stats_cache_ttl):
+        self.name = name
+        self.expire = expire
+
+    @property
+    def redis(self):
+        return FastAPICache.get_backend().redis
+
+    def version_key(self) -> str:
+        return f"stats-version:{self.name}"
+
+    def bucket_key(self, version: int, series: str, bucket: date) -> str:
+        return f"{FastAPICache.get_prefix()}:stats:{self.name}:v{version}:{series}:{bucket.isoformat()}"
+
+    async def get_many(self, series: str, buckets: List[date]) -> tuple[Optional[int], Dict[date, Dict[str, int]]]:
+        if not buckets:
+            return None, {}
+        try:
+            version = int(await self.redis.get(self.version_key()) or 0)
+            values = await self.redis.mget([self.bucket_key(version, series, bucket) for bucket in buckets])
+        except Exception as e:
+            logger.warning(f"Statistics cache read error: {e}")
+            return None, {}
+        return version, {
+            bucket: json.loads(value)
+            for bucket, value in zip(buckets, values)
+            if value is not None
+        }
+
+    async def set_many(self, version: Optional[int], series: str, values: Dict[date, Dict[str, int]]) -> None:
+        if version is None or not values:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for bucket, value in values.items():
+                    pipe.set(self.bucket_key(version, series, bucket), json.dumps(value), ex=self.expire)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Statistics cache write error: {e}")
+
+    async def invalidate(self) -> None:
+        try:
+            await self.redis.incr(self.version_key())
+        except Exception as e:
+            logger.error(f"Statistics cache invalidation error: {e}")
+
+
+documents_stats_cache = BucketCache("documents")
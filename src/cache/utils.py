@@ -4,16 +4,26 @@ from typing import Any
 import base64
 import json
 
-class Base64Coder(Coder):
+
+class TaggedCoder(Coder):
+    """
+    Кодировщик с явной меткой типа: "b:" - base64 для bytes, "j:" - JSON.
+    Формат определяется по метке, без попыток декодирования по исключению.
+    """
+
     @classmethod
     def encode(cls, value: Any) -> str:
         if isinstance(value, bytes):
-            return base64.b64encode(value).decode('utf-8')
-        return json.dumps(value, default=str).encode('utf-8')
+            return "b:" + base64.b64encode(value).decode('utf-8')
+        return "j:" + json.dumps(value, default=str)
 
     @classmethod
-    def decode(cls, value: bytes) -> Any:
-        try:
-            return base64.b64decode(value)
-        except:
-            return json.loads(value.decode('utf-8'))
\ No newline at end of file
+    def decode(cls, value: Any) -> Any:
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        tag, payload = value[:2], value[2:]
+        if tag == "b:":
+            return base64.b64decode(payload)
+        if tag == "j:":
+            return json.loads(payload)
+        raise ValueError(f"Unknown cache value tag: {tag!r}")
@@ -18,6 +18,43 @@ class AuthJWT(BaseModel):
     public_key_path: Path = BASE_DIR / "certs" / "jwt-public.pem"
     algorithm: str = "RS256"
     access_token_expire_minutes: int = 45
+    verified_token_cache_size: int = 4096
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+
+class DatabaseEngine(BaseModel):
+    pool_size: int = int(os.getenv("DB_POOL_SIZE", 10))
+    max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    pool_pre_ping: bool = env_bool("DB_POOL_PRE_PING", True)
+    prepared_statement_cache_size: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 500))
+    statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+    sql_log: bool = env_bool("DB_SQL_LOG", ENVIRONMENT == "development")
+    sql_log_sample_rate: float = float(os.getenv("DB_SQL_LOG_SAMPLE_RATE", 1.0))
+
+class PasswordHashing(BaseModel):
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    max_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+    queue_timeout: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+class BackgroundJobs(BaseModel):
+    enabled: bool = env_bool("BACKGROUND_JOBS_ENABLED", True)
+    leader_lock_ttl: float = float(os.getenv("BACKGROUND_JOBS_LOCK_TTL", 15))
+    metrics_interval: float = float(os.getenv("METRICS_UPDATE_INTERVAL", 300))
+    metrics_jitter: float = float(os.getenv("METRICS_UPDATE_JITTER", 30))
+    document_stats_interval: float = float(os.getenv("DOCUMENT_STATS_REBUILD_INTERVAL", 24 * 3600))
+    document_stats_jitter: float = float(os.getenv("DOCUMENT_STATS_REBUILD_JITTER", 600))
+    thumbnails_interval: float = float(os.getenv("THUMBNAILS_INTERVAL", 600))
+    thumbnails_jitter: float = float(os.getenv("THUMBNAILS_JITTER", 60))
+    upload_gc_interval: float = float(os.getenv("UPLOAD_GC_INTERVAL", 900))
+    upload_gc_jitter: float = float(os.getenv("UPLOAD_GC_JITTER", 60))
+    blob_gc_interval: float = float(os.getenv("BLOB_GC_INTERVAL", 3600))
+    blob_gc_jitter: float = float(os.getenv("BLOB_GC_JITTER", 300))
 
 class Settings(BaseSettings):
     DB_USER: str
@@ -32,8 +69,57 @@ class Settings(BaseSettings):
     
     api_v1_prefix: str = "/api/v1"
     auth_jwt: ClassVar[AuthJWT] = AuthJWT()
+    db_engine: ClassVar[DatabaseEngine] = DatabaseEngine()
+    background_jobs: ClassVar[BackgroundJobs] = BackgroundJobs()
+    password_hashing: ClassVar[PasswordHashing] = PasswordHashing()
     cache_ttl: ClassVar[int] = 3600
+    object_cache_ttl: ClassVar[int] = 24 * 3600
+    local_cache_ttl: ClassVar[int] = 30
+    local_cache_max_entries: ClassVar[int] = 10000
+    cache_invalidation_channel: ClassVar[str] = "cache-invalidation"
+    principal_cache_ttl: ClassVar[int] = 60
+    stats_cache_ttl: ClassVar[int] = 30 * 24 * 3600
+    stats_max_buckets: ClassVar[int] = 400
+    page_size_default: ClassVar[int] = 100
+    page_size_max: ClassVar[int] = 1000
+    bulk_max_items: ClassVar[int] = 1000
     redis_url: ClassVar[str] = os.getenv("REDIS_URL", "redis://localhost:6379")  
+    storage_path: ClassVar[Path] = Path(os.getenv("STORAGE_PATH", BASE_DIR / "storage_data"))
+    upload_chunk_size: ClassVar[int] = 1024 * 1024
+    storage_backend: ClassVar[str] = os.getenv("STORAGE_BACKEND", "local")
+    s3_endpoint_url: ClassVar[str] = os.getenv("S3_ENDPOINT_URL", "http://localhost:9000")
+    s3_bucket: ClassVar[str] = os.getenv("S3_BUCKET", "documents")
+    s3_access_key: ClassVar[str] = os.getenv("S3_ACCESS_KEY", "")
+    s3_secret_key: ClassVar[str] = os.getenv("S3_SECRET_KEY", "")
+    s3_region: ClassVar[str] = os.getenv("S3_REGION", "us-east-1")
+    s3_part_size: ClassVar[int] = 8 * 1024 * 1024
+    storage_compression: ClassVar[str] = os.getenv("STORAGE_COMPRESSION", "zstd")
+    compression_level: ClassVar[int] = int(os.getenv("COMPRESSION_LEVEL", 3))
+    compression_min_size: ClassVar[int] = int(os.getenv("COMPRESSION_MIN_SIZE", 4096))
+    compression_max_ratio: ClassVar[float] = float(os.getenv("COMPRESSION_MAX_RATIO", 0.9))
+    compression_sample_size: ClassVar[int] = 128 * 1024
+    upload_session_ttl: ClassVar[int] = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
+    upload_max_size: ClassVar[int] = int(os.getenv("UPLOAD_MAX_SIZE", 10 * 1024 ** 3))
+    upload_max_chunk_size: ClassVar[int] = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", 16 * 1024 * 1024))
+    blob_gc_grace: ClassVar[int] = int(os.getenv("BLOB_GC_GRACE", 3600))
+    blob_gc_batch_size: ClassVar[int] = int(os.getenv("BLOB_GC_BATCH_SIZE", 500))
+    download_cache_path: ClassVar[Path] = Path(os.getenv("DOWNLOAD_CACHE_PATH", BASE_DIR / "download_cache"))
+    download_cache_max_bytes: ClassVar[int] = int(
+        os.getenv("DOWNLOAD_CACHE_MAX_BYTES", 0 if storage_backend == "local" else 512 * 1024 * 1024)
+    )
+    download_cache_max_object_size: ClassVar[int] = int(
+        os.getenv("DOWNLOAD_CACHE_MAX_OBJECT_SIZE", 8 * 1024 * 1024)
+    )
+    thumbnail_size: ClassVar[int] = int(os.getenv("THUMBNAIL_SIZE", 320))
+    thumbnail_quality: ClassVar[int] = int(os.getenv("THUMBNAIL_QUALITY", 80))
+    thumbnail_max_source_size: ClassVar[int] = int(os.getenv("THUMBNAIL_MAX_SOURCE_SIZE", 256 * 1024 * 1024))
+    thumbnail_timeout: ClassVar[int] = int(os.getenv("THUMBNAIL_TIMEOUT", 60))
+    thumbnail_workers: ClassVar[int] = int(os.getenv("THUMBNAIL_WORKERS", 2))
+    thumbnail_batch_size: ClassVar[int] = int(os.getenv("THUMBNAIL_BATCH_SIZE", 50))
+    download_mode: ClassVar[str] = os.getenv("DOWNLOAD_MODE", "stream")
+    download_accel_location: ClassVar[str] = os.getenv("DOWNLOAD_ACCEL_LOCATION", "/protected-files")
+    download_accel_secret: ClassVar[str] = os.getenv("DOWNLOAD_ACCEL_SECRET", "")
+    download_accel_ttl: ClassVar[int] = int(os.getenv("DOWNLOAD_ACCEL_TTL", 60))
 
     def get_db_url(self):
         return (
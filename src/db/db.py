@@ -1,5 +1,10 @@
+import random
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from sqlalchemy import Integer, func
+from typing import Awaitable, Callable, List, Optional
+from sqlalchemy import Integer, event, func
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
     AsyncSession,
@@ -14,15 +19,112 @@ from sqlalchemy.orm import (
     mapped_column,
 )
 
-from config import settings
+from config import settings, logger
 
 DATABASE_URL = settings.get_db_url()
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL, echo=True)
+engine: AsyncEngine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=settings.db_engine.pool_size,
+    max_overflow=settings.db_engine.max_overflow,
+    pool_timeout=settings.db_engine.pool_timeout,
+    pool_recycle=settings.db_engine.pool_recycle,
+    pool_pre_ping=settings.db_engine.pool_pre_ping,
+    connect_args={
+        "prepared_statement_cache_size": settings.db_engine.prepared_statement_cache_size,
+        "server_settings": {
+            "statement_timeout": str(settings.db_engine.statement_timeout_ms),
+        },
+    },
+)
+
+
+if settings.db_engine.sql_log:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_sql_timer(conn, cursor, statement, parameters, context, executemany):
+        if random.random() < settings.db_engine.sql_log_sample_rate:
+            conn.info.setdefault("sql_log_start", []).append(time.perf_counter())
+        else:
+            conn.info.setdefault("sql_log_start", []).append(None)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def log_sql(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["sql_log_start"].pop()
+        if started is not None:
+            logger.debug(f"SQL ({(time.perf_counter() - started) * 1000:.1f} ms): {statement}")
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+class UnitOfWork:
+    """
+    Одна сессия и одна транзакция на запрос (или фоновую задачу).
+    Сессия открывается лениво при первом обращении к репозиторию.
+    """
+
+    def __init__(self):
+        self.session: Optional[AsyncSession] = None
+        self.after_commit_callbacks: List[Callable[[], Awaitable]] = []
+        self.closed = False
+
+    def get_session(self) -> AsyncSession:
+        if self.session is None:
+            self.session = async_session_maker()
+        return self.session
+
+    async def commit(self) -> None:
+        if self.session is not None:
+            await self.session.commit()
+        callbacks, self.after_commit_callbacks = self.after_commit_callbacks, []
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"After-commit callback error: {e}")
+
+    async def rollback(self) -> None:
+        self.after_commit_callbacks = []
+        if self.session is not None:
+            await self.session.rollback()
+
+    async def close(self) -> None:
+        self.closed = True
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar("current_unit_of_work", default=None)
+
+
+@asynccontextmanager
+async def unit_of_work():
+    uow = UnitOfWork()
+    token = current_unit_of_work.set(uow)
+    try:
+        yield uow
+        await uow.commit()
+    except BaseException:
+        await uow.rollback()
+        raise
+    finally:
+        await uow.close()
+        current_unit_of_work.reset(token)
+
+
+async def after_commit(callback: Callable[[], Awaitable]) -> None:
+    uow = current_unit_of_work.get()
+    if uow is None or uow.closed:
+        await callback()
+    else:
+        uow.after_commit_callbacks.append(callback)
+
+
 async def get_async_session() -> AsyncSession:
+    uow = current_unit_of_work.get()
+    if uow is not None and not uow.closed:
+        yield uow.get_session()
+        return
     async with async_session_maker() as session:
         yield session
 
@@ -30,7 +132,7 @@ class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now(), index=True)
     updated_at: Mapped[datetime] = mapped_column(
         server_default=func.now(), onupdate=func.now()
     )
@@ -42,9 +144,18 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 def connection(method):
     async def wrapper(*args, **kwargs):
+        if kwargs.get("session") is not None:
+            return await method(*args, **kwargs)
+
+        uow = current_unit_of_work.get()
+        if uow is not None and not uow.closed:
+            return await method(*args, session=uow.get_session(), **kwargs)
+
         async with async_session_maker() as session:
             try:
-                return await method(*args, session=session, **kwargs)
+                result = await method(*args, session=session, **kwargs)
+                await session.commit()
+                return result
             except Exception as e:
                 await session.rollback()
                 raise e
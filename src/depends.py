@@ -2,22 +2,46 @@ from repositories.users import UserRepository
 from repositories.roles import RoleRepository
 from repositories.patients import PatientRepository
 from repositories.documents import DocumentRepository
+from repositories.uploads import UploadSessionRepository
 
 from services.users import UserService
 from services.roles import RoleService
 from services.patients import PatientService
 from services.documents import DocumentService
+from services.uploads import UploadService
+
+from storage.base import BlobStore
+from storage.local import LocalBlobStore
+from cache.files import FileCache
+from config import settings
+
+
+def create_blob_store() -> BlobStore:
+    if settings.storage_backend == "s3":
+        from storage.s3 import S3BlobStore
+        return S3BlobStore()
+    return LocalBlobStore(settings.storage_path)
+
 
 
 user_repository = UserRepository()
 role_repository = RoleRepository()
 patient_repository = PatientRepository()
 document_repository = DocumentRepository()
+upload_session_repository = UploadSessionRepository()
+
+blob_store = create_blob_store()
+file_cache = FileCache(
+    settings.download_cache_path,
+    settings.download_cache_max_bytes,
+    settings.download_cache_max_object_size,
+) if settings.download_cache_max_bytes else None
 
 user_service = UserService(user_repository)
 role_service = RoleService(role_repository)
 patient_service = PatientService(patient_repository)
-document_service = DocumentService(document_repository)
+document_service = DocumentService(document_repository, blob_store, file_cache)
+upload_service = UploadService(upload_session_repository, document_service, blob_store)
 
 
 def get_user_service() -> UserService:
@@ -32,4 +56,5 @@ def get_patient_service() -> PatientService:
 def get_document_service() -> DocumentService:
     return document_service
 
-
+def get_upload_service() -> UploadService:
+    return upload_service
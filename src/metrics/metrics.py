@@ -1,11 +1,17 @@
-from prometheus_client import Counter, Gauge, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, REGISTRY
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, text
+from sqlalchemy import String, cast, func, literal, select, text, union_all
 from fastapi import Request
 from fastapi.responses import PlainTextResponse
+from fastapi_cache import FastAPICache
+import asyncio
+import json
 import time
 from datetime import datetime, timedelta
-from models.models import User, Document, Patient, Role
+from models.models import User, Document, Patient, Role, Blob, SubDirectories
+from db.db import engine
+from config import settings, logger
 
 REQUEST_COUNT = Counter(
     'http_requests_total',
@@ -13,17 +19,24 @@ REQUEST_COUNT = Counter(
     ['method', 'endpoint', 'status_code']
 )
 
-DAU = Gauge('dau', 'Daily Active Users')
-DOCUMENTS_TOTAL = Gauge('documents_total', 'Total uploaded documents')
-DOCUMENTS_BY_TYPE = Counter(
-    'documents_by_type',
-    'Documents count by category',
-    ['document_type']
-)
-
 DB_ACTIVE_CONNECTIONS = Gauge(
     'db_active_connections',
-    'Количество активных подключений к Базе Данных'
+    'Количество подключений к Базе Данных, выданных из пула'
+)
+
+DB_POOL_SIZE = Gauge(
+    'db_pool_size',
+    'Configured size of the database connection pool'
+)
+
+DB_POOL_CHECKED_IN = Gauge(
+    'db_pool_checked_in',
+    'Idle connections in the database pool'
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Connections opened above the pool size'
 )
 
 DB_RESPONSE_TIME = Histogram(
@@ -37,102 +50,283 @@ APP_HEALTH = Gauge(
     'Health status of the application (1 = healthy, 0 = unhealthy)'
 )
 
+HEALTH_CHECK_TIMEOUT = 2
+
 HTTP_ERRORS = Counter(
     'http_errors_total',
     'HTTP errors (4xx and 5xx)',
     ['method', 'endpoint', 'status_code']
 )
 
-AVG_PATIENT_AGE = Gauge(
-    "patient_avg_age",
-    "Average patient age"
+API_RESPONSE_TIME = Histogram(
+    'api_response_time_seconds',
+    'API response time distribution',
+    ['method', 'endpoint', 'status_code'],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
 )
 
-USERS_BY_ROLE = Gauge(
-    'users_by_role',
-    'Users count by role',
-    ['role_name']
+DOWNLOAD_CACHE_REQUESTS = Counter(
+    'download_cache_requests_total',
+    'Download cache lookups by result (hit, miss, bypass)',
+    ['result']
 )
 
-PATIENTS_AGE_DISTRIBUTION = Histogram(
-    'patients_age_distribution',
-    'Patients age distribution',
-    buckets=[0, 3, 6, 9, 12, 15, 18]
+DOWNLOAD_CACHE_EVICTIONS = Counter(
+    'download_cache_evictions_total',
+    'Files evicted from the download cache'
 )
 
-NEW_PATIENTS_TOTAL = Counter(
-    'new_patients_registered_total',
-    'Новый пациенты в системе'
+DOWNLOAD_CACHE_BYTES = Gauge(
+    'download_cache_bytes',
+    'Bytes currently held in the download cache'
 )
 
-API_RESPONSE_TIME = Histogram(
-    'api_response_time_seconds',
-    'API response time distribution',
-    ['method', 'endpoint', 'status_code'],
-    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+BUSINESS_METRICS_DURATION = Histogram(
+    'business_metrics_collection_seconds',
+    'Time spent computing business metrics',
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
 )
 
-async def update_metrics(session: AsyncSession):
-    try:
-        start_time = time.time()
-        await session.execute(text("SELECT 1"))
-        duration = time.time() - start_time
-        DB_RESPONSE_TIME.observe(duration)
+BUSINESS_METRICS_LAST_SUCCESS = Gauge(
+    'business_metrics_last_success_timestamp_seconds',
+    'Unix time of the last successful business metrics collection'
+)
+
+SCHEDULER_LEADER = Gauge(
+    'scheduler_leader',
+    'Whether this process holds the background scheduler lock (1 = leader)'
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    'scheduler_job_duration_seconds',
+    'Background job run time',
+    ['job'],
+    buckets=[0.1, 0.5, 1, 5, 15, 60, 300, 900]
+)
+
+SCHEDULER_JOB_FAILURES = Counter(
+    'scheduler_job_failures_total',
+    'Background job runs that raised or timed out',
+    ['job']
+)
+
+DEDUPLICATED_UPLOADS = Counter(
+    'storage_deduplicated_uploads_total',
+    'Documents created from already stored content without an upload'
+)
+
+DEDUPLICATED_BYTES = Counter(
+    'storage_deduplicated_bytes_total',
+    'Upload bytes skipped by creating documents from stored content'
+)
+
+PATIENT_AGE_BUCKETS = [0, 3, 6, 9, 12, 15, 18]
+BUSINESS_METRICS_KEY = "metrics:business"
+
+
+class BusinessMetricsCollector:
+    """
+    Бизнес-метрики, посчитанные агрегатными запросами.
+    Отдаёт последний снимок целиком, поэтому удалённые роли
+    и категории не остаются в выдаче со старыми значениями.
+    """
+
+    def __init__(self):
+        self.snapshot = None
 
-        connections = await session.execute(
-            text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+    def collect(self):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+
+        yield GaugeMetricFamily('dau', 'Daily Active Users', value=snapshot["active_users"])
+        yield GaugeMetricFamily('documents_total', 'Total uploaded documents', value=snapshot["documents_total"])
+
+        documents_by_type = GaugeMetricFamily(
+            'documents_by_type', 'Documents count by category', labels=['document_type']
         )
-        DB_ACTIVE_CONNECTIONS.set(connections.scalar())
+        for document_type, count in snapshot["documents_by_type"].items():
+            documents_by_type.add_metric([document_type], count)
+        yield documents_by_type
+
+        users_by_role = GaugeMetricFamily('users_by_role', 'Users count by role', labels=['role_name'])
+        for role_name, count in snapshot["users_by_role"].items():
+            users_by_role.add_metric([role_name], count)
+        yield users_by_role
 
-        active_users = await session.execute(
-            select(func.count(User.id)).where(User.active == True)
+        yield GaugeMetricFamily('patient_avg_age', 'Average patient age', value=snapshot["avg_age"])
+        yield GaugeMetricFamily(
+            'new_patients_last_hour',
+            'Пациенты, зарегистрированные за последний час',
+            value=snapshot["new_patients_last_hour"]
+        )
+        yield GaugeMetricFamily(
+            'storage_stored_bytes',
+            'Bytes held in the blob store by referenced content',
+            value=snapshot["storage_stored_bytes"]
+        )
+        storage_saved = GaugeMetricFamily(
+            'storage_saved_bytes',
+            'Bytes not stored thanks to deduplication and compression',
+            labels=['reason']
         )
-        dau = active_users.scalar()
-        APP_HEALTH.set(1 if dau is not None else 0)
+        for reason in ("deduplication", "compression"):
+            storage_saved.add_metric([reason], snapshot["storage_saved"][reason])
+        yield storage_saved
+        yield HistogramMetricFamily(
+            'patients_age_distribution',
+            'Patients age distribution',
+            buckets=snapshot["age_buckets"],
+            sum_value=snapshot["age_sum"]
+        )
+
+
+business_metrics = BusinessMetricsCollector()
+REGISTRY.register(business_metrics)
+
+
+def patients_summary_query():
+    age_buckets = [
+        func.count(Patient.id).filter(Patient.age <= bound).label(f"age_le_{bound}")
+        for bound in PATIENT_AGE_BUCKETS
+    ]
+    active_users = (
+        select(func.count(User.id))
+        .where(User.active == True)
+        .scalar_subquery()
+    )
+    blobs = select(Blob).where(Blob.ref_count > 0).subquery()
+    stored_bytes = select(
+        func.coalesce(func.sum(func.coalesce(blobs.c.stored_size, blobs.c.size)), 0)
+    ).scalar_subquery()
+    deduplicated_bytes = select(
+        func.coalesce(func.sum((blobs.c.ref_count - 1) * blobs.c.size), 0)
+    ).scalar_subquery()
+    compressed_bytes = select(
+        func.coalesce(func.sum(blobs.c.size - blobs.c.stored_size), 0)
+    ).where(blobs.c.codec.is_not(None)).scalar_subquery()
+    return select(
+        active_users.label("active_users"),
+        stored_bytes.label("storage_stored_bytes"),
+        deduplicated_bytes.label("storage_saved_deduplication"),
+        compressed_bytes.label("storage_saved_compression"),
+        func.count(Patient.id).label("patients"),
+        func.coalesce(func.sum(Patient.age), 0).label("age_sum"),
+        func.coalesce(func.avg(Patient.age), 0).label("avg_age"),
+        func.count(Patient.id).filter(
+            Patient.created_at >= datetime.now() - timedelta(hours=1)
+        ).label("new_patients_last_hour"),
+        *age_buckets
+    )
+
+
+def grouped_counts_query():
+    users_by_role = (
+        select(literal("role").label("kind"), Role.name.label("name"), func.count(User.id).label("count"))
+        .outerjoin(User, User.role_id == Role.id)
+        .group_by(Role.name)
+    )
+    documents_by_type = (
+        select(
+            literal("document").label("kind"),
+            cast(Document.subdirectory_type, String).label("name"),
+            func.count(Document.id).label("count")
+        )
+        .group_by(Document.subdirectory_type)
+    )
+    return union_all(users_by_role, documents_by_type)
 
+
+async def update_metrics(session: AsyncSession):
+    try:
+        start_time = time.time()
+        await session.execute(text("SELECT 1"))
+        DB_RESPONSE_TIME.observe(time.time() - start_time)
     except Exception as e:
         APP_HEALTH.set(0)
         DB_RESPONSE_TIME.observe(5)
         raise e
 
-    active_users = await session.execute(
-        select(func.count(User.id)).where(User.active == True)
-    )
-    DAU.set(active_users.scalar())
+    APP_HEALTH.set(1)
+    update_pool_metrics()
 
-    new_patients_last_hour = await session.execute(
-        select(func.count(Patient.id))
-        .where(Patient.created_at >= datetime.now() - timedelta(hours=1))
-    )
-    NEW_PATIENTS_TOTAL.inc(new_patients_last_hour.scalar())
+    with BUSINESS_METRICS_DURATION.time():
+        summary = (await session.execute(patients_summary_query())).one()
+        grouped = (await session.execute(grouped_counts_query())).all()
 
-    patients = await session.execute(select(Patient))
-    for patient in patients.scalars():
-        PATIENTS_AGE_DISTRIBUTION.observe(patient.age)
+        users_by_role = {}
+        documents_by_type = {subdirectory.value: 0 for subdirectory in SubDirectories}
+        for kind, name, count in grouped:
+            if kind == "role":
+                users_by_role[name] = count
+            else:
+                documents_by_type[SubDirectories[name].value] = count
 
-    roles_count = await session.execute(
-        select(Role.name, func.count(User.id))
-        .join(User)
-        .group_by(Role.name)
+        age_buckets = [
+            (str(bound), getattr(summary, f"age_le_{bound}"))
+            for bound in PATIENT_AGE_BUCKETS
+        ]
+        age_buckets.append(("+Inf", summary.patients))
+
+        snapshot = {
+            "active_users": summary.active_users,
+            "documents_total": sum(documents_by_type.values()),
+            "documents_by_type": documents_by_type,
+            "users_by_role": users_by_role,
+            "avg_age": float(summary.avg_age),
+            "new_patients_last_hour": summary.new_patients_last_hour,
+            "age_buckets": age_buckets,
+            "age_sum": summary.age_sum,
+            "storage_stored_bytes": int(summary.storage_stored_bytes),
+            "storage_saved": {
+                "deduplication": int(summary.storage_saved_deduplication),
+                "compression": int(summary.storage_saved_compression),
+            },
+        }
+
+    business_metrics.snapshot = snapshot
+    BUSINESS_METRICS_LAST_SUCCESS.set_to_current_time()
+    await FastAPICache.get_backend().redis.set(
+        BUSINESS_METRICS_KEY,
+        json.dumps(snapshot),
+        ex=int(settings.background_jobs.metrics_interval * 3)
     )
-    for role_name, count in roles_count:
-        USERS_BY_ROLE.labels(role_name=role_name).set(count)
 
-    avg_age_result = await session.execute(select(func.avg(Patient.age)))
-    avg_age = avg_age_result.scalar()
-    AVG_PATIENT_AGE.set(avg_age if avg_age is not None else 0)
 
-    total_docs = await session.execute(select(func.count(Document.id)))
-    DOCUMENTS_TOTAL.set(total_docs.scalar())
+async def load_business_metrics():
+    """Снимок считает только лидер планировщика, остальные воркеры читают его из Redis"""
+    try:
+        cached = await FastAPICache.get_backend().redis.get(BUSINESS_METRICS_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to load business metrics snapshot: {e}")
+        return
+    if cached:
+        snapshot = json.loads(cached)
+        snapshot["age_buckets"] = [tuple(bucket) for bucket in snapshot["age_buckets"]]
+        business_metrics.snapshot = snapshot
 
-    docs_by_type = await session.execute(
-        select(Document.subdirectory_type, func.count(Document.id))
-        .group_by(Document.subdirectory_type)
-    )
-    for doc_type, count in docs_by_type:
-        DOCUMENTS_BY_TYPE.labels(document_type=doc_type.value).inc(count)
+def update_pool_metrics():
+    pool = engine.pool
+    DB_POOL_SIZE.set(pool.size())
+    DB_POOL_CHECKED_IN.set(pool.checkedin())
+    DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    DB_ACTIVE_CONNECTIONS.set(pool.checkedout())
+
+async def check_health():
+    """Здоровье считается каждым воркером: update_metrics выполняется только на лидере"""
+    try:
+        async with engine.connect() as connection:
+            await asyncio.wait_for(connection.execute(text("SELECT 1")), HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Health check failed: {e}")
+        APP_HEALTH.set(0)
+        return
+    APP_HEALTH.set(1)
 
-def get_metrics(request: Request):
+async def get_metrics(request: Request):
+    await check_health()
+    update_pool_metrics()
+    await load_business_metrics()
     return PlainTextResponse(
         generate_latest(),
         media_type='text/plain'
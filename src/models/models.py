@@ -1,6 +1,7 @@
 from typing import Optional, List
 from enum import Enum
-from sqlalchemy import ForeignKey, LargeBinary, String, Integer, Boolean, Enum as SQLAlchemyEnum, event
+from datetime import date, datetime
+from sqlalchemy import ForeignKey, LargeBinary, String, Integer, BigInteger, Boolean, Date, Index, JSON, UniqueConstraint, Enum as SQLAlchemyEnum, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -38,11 +39,24 @@ class Role(Base):
 
 
 class Document(Base):
+    __table_args__ = (
+        Index("ix_documents_author_id_created_at", "author_id", "created_at"),
+        Index("ix_documents_patient_id_created_at", "patient_id", "created_at"),
+    )
+
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    data: Mapped[bytes] = mapped_column(LargeBinary)
+    data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    storage_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # кодек сжатия в хранилище (None - как есть) и размер хранимого объекта
+    codec: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    stored_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    # NULL - миниатюра ещё не создана, "" - для файла миниатюру сделать нельзя
+    thumbnail_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     
     patient_id: Mapped[int] = mapped_column(
-        ForeignKey("patients.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("patients.id", ondelete="CASCADE"), nullable=False, index=True
     )
     patient: Mapped["Patient"] = relationship(
         "Patient", back_populates="documents"
@@ -53,7 +67,7 @@ class Document(Base):
     )
     
     author_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
     )
     author: Mapped[Optional["User"]] = relationship(
         "User", back_populates="documents"
@@ -64,14 +78,22 @@ class Document(Base):
         cls, 
         session: AsyncSession, 
         name: str, 
-        data: bytes, 
+        storage_key: str, 
+        size: int, 
+        checksum: str, 
         patient_id: int, 
         subdirectory_type: SubDirectories, 
-        author_id: int
+        author_id: int,
+        codec: Optional[str] = None,
+        stored_size: Optional[int] = None
     ) -> "Document":
         document = cls(
             name=name,
-            data=data,
+            storage_key=storage_key,
+            size=size,
+            checksum=checksum,
+            codec=codec,
+            stored_size=stored_size,
             patient_id=patient_id,
             subdirectory_type=subdirectory_type,
             author_id=author_id
@@ -81,6 +103,53 @@ class Document(Base):
         return document
 
 
+class DocumentDailyStat(Base):
+    """
+    Количество документов за день в разрезе автора и папки.
+    Поддерживается инкрементально при создании, изменении и удалении документов;
+    author_id = 0 означает документ без автора.
+    """
+    __table_args__ = (
+        UniqueConstraint("day", "author_id", "subdirectory_type", name="uq_documentdailystats_bucket"),
+    )
+
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    author_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    subdirectory_type: Mapped[SubDirectories] = mapped_column(
+        SQLAlchemyEnum(SubDirectories), nullable=False
+    )
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Blob(Base):
+    """
+    Объект в хранилище (ключ - sha256 содержимого) со счётчиком ссылок
+    из documents.storage_key и documents.thumbnail_key.
+    Поддерживается инкрементально вместе с документами.
+    """
+    key: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    codec: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    stored_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UploadSession(Base):
+    """
+    Незавершённая загрузка файла частями.
+    parts - имена сохранённых частей в хранилище в порядке смещения.
+    """
+    key: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    parts: Mapped[List[str]] = mapped_column(JSON, nullable=False, default=list)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+
+
 class Patient(Base):
     fio: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
     age: Mapped[int] = mapped_column(Integer, nullable=False)
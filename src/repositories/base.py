@@ -1,10 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, TypeVar, Generic
+from typing import AsyncIterator, List, Dict, TypeVar, Generic, Sequence, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
-from db.db import connection
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import insert, update, delete, tuple_
+from db.db import connection, async_session_maker
+from .pagination import SORTABLE_COLUMNS, decode_cursor, split_filters
+from sqlalchemy.orm import sessionmaker, defer
 
 T = TypeVar("T")
 D = TypeVar("D")
@@ -40,14 +41,86 @@ class IRepository(ABC, Generic[T]):
 class BaseRepository(IRepository, Generic[D]):
     model: D
 
-    def __init__(self, model: D):
+    def __init__(self, model: D, deferred_columns: Sequence[str] = ()):
         self.model = model
+        self.deferred_columns = tuple(deferred_columns)
+
+    def select(self, with_deferred: bool = False):
+        query = select(self.model)
+        if not with_deferred and self.deferred_columns:
+            query = query.options(
+                *(defer(getattr(self.model, column), raiseload=True) for column in self.deferred_columns)
+            )
+        return query
+
+    def apply_filters(self, query, filters: Optional[Dict] = None):
+        for column_name, op, value in split_filters(filters or {}):
+            column = getattr(self.model, column_name)
+            if op == ">=":
+                query = query.where(column >= value)
+            elif op == "<=":
+                query = query.where(column <= value)
+            else:
+                query = query.where(column == value)
+        return query
+
+    def apply_keyset(
+        self,
+        query,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        descending: bool = False,
+    ):
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Unsupported ordering: {order_by}")
+        sort_column = getattr(self.model, order_by)
+        if order_by == "id":
+            key = self.model.id
+            ordering = [key.desc() if descending else key.asc()]
+        else:
+            key = tuple_(sort_column, self.model.id)
+            ordering = [
+                sort_column.desc() if descending else sort_column.asc(),
+                self.model.id.desc() if descending else self.model.id.asc(),
+            ]
+        if cursor:
+            value, obj_id = decode_cursor(order_by, cursor)
+            bound = obj_id if order_by == "id" else tuple_(value, obj_id)
+            query = query.where(key < bound if descending else key > bound)
+        return query.order_by(*ordering)
 
     @connection
-    async def get_all(self, session: AsyncSession) -> List[D]:
-        result = await session.execute(select(self.model))
+    async def get_all(
+        self,
+        session: AsyncSession,
+        filters: Optional[Dict] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: str = "id",
+        descending: bool = False,
+    ) -> List[D]:
+        query = self.apply_filters(self.select(), filters)
+        query = self.apply_keyset(query, cursor, order_by, descending)
+        if limit:
+            query = query.limit(limit)
+        result = await session.execute(query)
         return result.scalars().all()
 
+    async def stream_all(
+        self,
+        filters: Optional[Dict] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[D]:
+        """
+        Потоковое чтение через серверный курсор.
+        Использует собственную сессию, так как живёт дольше обработчика запроса.
+        """
+        query = self.apply_filters(self.select(), filters).order_by(self.model.id)
+        async with async_session_maker() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for obj in result.scalars():
+                yield obj
+
     @connection
     async def create(self, data: Dict, session: AsyncSession) -> D:
         if hasattr(data, "model_dump"):
@@ -55,13 +128,13 @@ class BaseRepository(IRepository, Generic[D]):
 
         model_instance = self.model(**data)
         session.add(model_instance)
-        await session.commit()
+        await session.flush()
         return model_instance
 
     @connection
-    async def get_by_id(self, obj_id: int, session: AsyncSession) -> D:
+    async def get_by_id(self, obj_id: int, session: AsyncSession, with_deferred: bool = False) -> D:
         result = await session.execute(
-            select(self.model).where(self.model.id == obj_id)
+            self.select(with_deferred).where(self.model.id == obj_id)
         )
         return result.scalars().first()
 
@@ -79,20 +152,60 @@ class BaseRepository(IRepository, Generic[D]):
             update(self.model)
             .where(self.model.id == obj_id)
             .values(**update_data)
-            .returning(self.model)
+            .returning(self.model.id)
         )
 
         result = await session.execute(stmt)
-        await session.commit()
+        await session.flush()
+        if result.scalar_one_or_none() is None:
+            return None
 
-        return result.scalar_one_or_none()
+        result = await session.execute(
+            self.select().where(self.model.id == obj_id).execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
 
     @connection
     async def delete(self, obj_id: int, session: AsyncSession) -> bool:
-        result = await self.get_by_id(obj_id)
+        result = await self.get_by_id(obj_id, session=session)
         if not result:
             return False
 
         await session.execute(delete(self.model).where(self.model.id == obj_id))
-        await session.commit()
+        await session.flush()
         return True
+
+    @connection
+    async def get_by_ids(self, obj_ids: Sequence[int], session: AsyncSession) -> List[D]:
+        if not obj_ids:
+            return []
+        result = await session.execute(
+            self.select().where(self.model.id.in_(obj_ids)).execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+
+    @connection
+    async def create_many(self, items: List[Dict], session: AsyncSession) -> List[D]:
+        if not items:
+            return []
+        result = await session.scalars(insert(self.model).returning(self.model, sort_by_parameter_order=True), items)
+        return result.all()
+
+    @connection
+    async def update_many(self, items: List[Dict], session: AsyncSession) -> List[D]:
+        """Обновление по первичному ключу: каждый словарь содержит id и изменяемые поля"""
+        items = [item for item in items if len(item) > 1]
+        if items:
+            await session.execute(update(self.model), items)
+            await session.flush()
+        return await self.get_by_ids([item["id"] for item in items], session=session)
+
+    @connection
+    async def delete_many(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        if not obj_ids:
+            return []
+        result = await session.execute(
+            delete(self.model).where(self.model.id.in_(obj_ids)).returning(self.model.id)
+        )
+        await session.flush()
+        return list(result.scalars().all())
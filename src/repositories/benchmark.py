@@ -0,0 +1,76 @@
+"""
+Время выборки страницы документов в зависимости от объёма хранимых данных:
+загрузка строк целиком против профиля репозитория с отложенной колонкой data.
+Тестовые строки вставляются в транзакции, которая затем откатывается.
+
+    python -m repositories.benchmark --rows 200 --payload-sizes 0 65536 1048576
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from sqlalchemy import insert, select
+
+from db.db import async_session_maker
+from models.models import Document, Patient, SubDirectories
+from .documents import DocumentRepository
+
+
+async def measure(session, query, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = await session.execute(query)
+        result.scalars().all()
+        timings.append(time.perf_counter() - start_time)
+        session.expunge_all()
+    return sorted(timings)[len(timings) // 2]
+
+
+async def benchmark(rows: int, payload_size: int, limit: int, repeat: int):
+    repository = DocumentRepository()
+    payload = os.urandom(payload_size)
+    async with async_session_maker() as session:
+        try:
+            patient_id = await session.scalar(
+                insert(Patient).values(fio=f"Benchmark {uuid.uuid4().hex}", age=0).returning(Patient.id)
+            )
+            await session.execute(insert(Document), [
+                {
+                    "name": f"benchmark-{index}.bin",
+                    "data": payload,
+                    "size": payload_size,
+                    "patient_id": patient_id,
+                    "subdirectory_type": SubDirectories.DIAGNOSTICS,
+                }
+                for index in range(rows)
+            ])
+            page = lambda query: query.where(Document.patient_id == patient_id).order_by(Document.id).limit(limit)
+            full = await measure(session, page(select(Document)), repeat)
+            deferred = await measure(session, page(repository.select()), repeat)
+        finally:
+            await session.rollback()
+    return full, deferred
+
+
+async def main(args) -> None:
+    print(f"{'payload KiB':>12}{'stored MiB':>12}{'full ms':>10}{'deferred ms':>13}")
+    for payload_size in args.payload_sizes:
+        full, deferred = await benchmark(args.rows, payload_size, args.limit, args.repeat)
+        print(
+            f"{payload_size / 1024:>12.0f}"
+            f"{args.rows * payload_size / 2 ** 20:>12.1f}"
+            f"{full * 1000:>10.1f}"
+            f"{deferred * 1000:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure document listing latency against stored payload size")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[0, 64 * 1024, 1024 * 1024])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import List, Sequence
+
+from sqlalchemy import delete, func, null, select, true, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.db import connection
+from models.models import Blob, Document
+
+
+class BlobRepository:
+    model = Blob
+
+    def references(self, where):
+        contents = (
+            select(
+                Document.storage_key.label("key"),
+                Document.size,
+                Document.codec,
+                Document.stored_size,
+                func.count().label("count"),
+            )
+            .where(where, Document.storage_key.is_not(None))
+            .group_by(Document.storage_key, Document.size, Document.codec, Document.stored_size)
+        )
+        thumbnails = (
+            select(
+                Document.thumbnail_key.label("key"),
+                null().label("size"),
+                null().label("codec"),
+                null().label("stored_size"),
+                func.count().label("count"),
+            )
+            .where(where, Document.thumbnail_key.is_not(None), Document.thumbnail_key != "")
+            .group_by(Document.thumbnail_key)
+        )
+        return union_all(contents, thumbnails)
+
+    async def apply_documents(self, session: AsyncSession, where, sign: int) -> None:
+        """Добавляет (sign=1) или снимает (sign=-1) ссылки документов, подходящих под условие where"""
+        result = await session.execute(self.references(where))
+        for row in result.all():
+            delta = sign * row.count
+            stmt = pg_insert(Blob).values(
+                key=row.key,
+                size=row.size,
+                codec=row.codec,
+                stored_size=row.stored_size,
+                ref_count=delta,
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[Blob.key],
+                    set_={
+                        "ref_count": Blob.ref_count + delta,
+                        "size": func.coalesce(Blob.size, stmt.excluded.size),
+                        "codec": func.coalesce(Blob.codec, stmt.excluded.codec),
+                        "stored_size": func.coalesce(Blob.stored_size, stmt.excluded.stored_size),
+                        "updated_at": func.now(),
+                    },
+                )
+            )
+
+    async def add_reference(self, session: AsyncSession, key: str, sign: int = 1) -> None:
+        stmt = pg_insert(Blob).values(key=key, ref_count=sign)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Blob.key],
+                set_={"ref_count": Blob.ref_count + sign, "updated_at": func.now()},
+            )
+        )
+
+    @connection
+    async def get_by_keys(self, keys: Sequence[str], session: AsyncSession, lock: bool = False) -> List[Blob]:
+        """Содержимое, на которое есть ссылки; lock удерживает его от удаления до конца транзакции"""
+        query = select(Blob).where(Blob.key.in_(keys), Blob.ref_count > 0, Blob.size.is_not(None))
+        if lock:
+            query = query.with_for_update(read=True)
+        result = await session.execute(query)
+        return list(result.scalars())
+
+    @connection
+    async def claim(self, key: str, session: AsyncSession) -> None:
+        """Отмечает содержимое как только что записанное: сборщик не тронет его до конца grace-периода"""
+        await self.add_reference(session, key, 0)
+
+    @connection
+    async def lock_unused(self, key: str, older_than: datetime, session: AsyncSession) -> bool:
+        """Блокирует запись без ссылок до конца транзакции; False, если её снова используют"""
+        result = await session.execute(
+            select(Blob.id)
+            .where(Blob.key == key, Blob.ref_count <= 0, Blob.updated_at < older_than)
+            .with_for_update(skip_locked=True)
+        )
+        return result.scalar() is not None
+
+    @connection
+    async def forget(self, key: str, session: AsyncSession) -> None:
+        await session.execute(delete(Blob).where(Blob.key == key))
+
+    @connection
+    async def unused(self, older_than: datetime, limit: int, session: AsyncSession) -> List[str]:
+        result = await session.execute(
+            select(Blob.key)
+            .where(Blob.ref_count <= 0, Blob.updated_at < older_than)
+            .order_by(Blob.updated_at)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    @connection
+    async def rebuild(self, session: AsyncSession) -> None:
+        await session.execute(update(Blob).values(ref_count=0))
+        await self.apply_documents(session, true(), 1)
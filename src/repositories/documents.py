@@ -1,7 +1,127 @@
-from models.models import Document
+from typing import Dict, List, Sequence
+
+from models.models import Document, SubDirectories
 from .base import BaseRepository
+from .statistics import DocumentStatsRepository
+from .blobs import BlobRepository
+from db.db import connection, after_commit
+from cache.statistics import documents_stats_cache
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STATS_FIELDS = {"author_id", "subdirectory_type"}
+# patient_id нет в documentdailystats, но по нему группируется кэш статистики
+STATS_CACHE_FIELDS = STATS_FIELDS | {"patient_id"}
+BLOB_FIELDS = {"storage_key", "thumbnail_key"}
 
 
 class DocumentRepository(BaseRepository):
     def __init__(self):
-        super().__init__(Document)
+        super().__init__(Document, deferred_columns=("data",))
+        self.stats = DocumentStatsRepository()
+        self.blobs = BlobRepository()
+
+    @connection
+    async def count_by_storage_key(self, storage_key: str, session: AsyncSession) -> int:
+        result = await session.execute(
+            select(func.count(Document.id)).where(
+                or_(Document.storage_key == storage_key, Document.thumbnail_key == storage_key)
+            )
+        )
+        return result.scalar()
+
+    @connection
+    async def pending_thumbnails(self, limit: int, session: AsyncSession) -> List[int]:
+        result = await session.execute(
+            select(Document.id)
+            .where(
+                Document.subdirectory_type == SubDirectories.PHOTOS_AND_VIDEOS,
+                Document.storage_key.is_not(None),
+                Document.thumbnail_key.is_(None),
+            )
+            .order_by(Document.id)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    @connection
+    async def set_thumbnail(self, obj_id: int, storage_key: str, thumbnail_key: str, session: AsyncSession) -> bool:
+        """Сохраняет миниатюру, только если файл документа не сменился за время её создания"""
+        result = await session.execute(
+            update(Document)
+            .where(
+                Document.id == obj_id,
+                Document.storage_key == storage_key,
+                Document.thumbnail_key.is_(None),
+            )
+            .values(thumbnail_key=thumbnail_key)
+            .returning(Document.id)
+        )
+        stored = result.scalar() is not None
+        if stored and thumbnail_key:
+            await self.blobs.add_reference(session, thumbnail_key)
+        return stored
+
+    @connection
+    async def create(self, data: Dict, session: AsyncSession) -> Document:
+        document = await super().create(data, session=session)
+        await self.stats.apply_documents(session, Document.id == document.id, 1)
+        await self.blobs.apply_documents(session, Document.id == document.id, 1)
+        return document
+
+    @connection
+    async def create_many(self, items: List[Dict], session: AsyncSession) -> List[Document]:
+        documents = await super().create_many(items, session=session)
+        if documents:
+            ids = [document.id for document in documents]
+            await self.stats.apply_documents(session, Document.id.in_(ids), 1)
+            await self.blobs.apply_documents(session, Document.id.in_(ids), 1)
+        return documents
+
+    @connection
+    async def update(self, obj_id: int, data: Dict, session: AsyncSession) -> Document:
+        if hasattr(data, "model_dump"):
+            data = data.model_dump()
+        affects_stats = bool(STATS_FIELDS & data.keys())
+        affects_blobs = bool(BLOB_FIELDS & data.keys())
+        if not affects_stats and STATS_CACHE_FIELDS & data.keys():
+            await after_commit(documents_stats_cache.invalidate)
+        if affects_stats:
+            await self.stats.apply_documents(session, Document.id == obj_id, -1)
+        if affects_blobs:
+            await self.blobs.apply_documents(session, Document.id == obj_id, -1)
+        document = await super().update(obj_id, data, session=session)
+        if affects_stats:
+            await self.stats.apply_documents(session, Document.id == obj_id, 1)
+        if affects_blobs:
+            await self.blobs.apply_documents(session, Document.id == obj_id, 1)
+        return document
+
+    @connection
+    async def update_many(self, items: List[Dict], session: AsyncSession) -> List[Document]:
+        ids = [item["id"] for item in items if STATS_FIELDS & item.keys()]
+        blob_ids = [item["id"] for item in items if BLOB_FIELDS & item.keys()]
+        if not ids and any(STATS_CACHE_FIELDS & item.keys() for item in items):
+            await after_commit(documents_stats_cache.invalidate)
+        if ids:
+            await self.stats.apply_documents(session, Document.id.in_(ids), -1)
+        if blob_ids:
+            await self.blobs.apply_documents(session, Document.id.in_(blob_ids), -1)
+        documents = await super().update_many(items, session=session)
+        if ids:
+            await self.stats.apply_documents(session, Document.id.in_(ids), 1)
+        if blob_ids:
+            await self.blobs.apply_documents(session, Document.id.in_(blob_ids), 1)
+        return documents
+
+    @connection
+    async def delete(self, obj_id: int, session: AsyncSession) -> bool:
+        await self.stats.apply_documents(session, Document.id == obj_id, -1)
+        await self.blobs.apply_documents(session, Document.id == obj_id, -1)
+        return await super().delete(obj_id, session=session)
+
+    @connection
+    async def delete_many(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        await self.stats.apply_documents(session, Document.id.in_(obj_ids), -1)
+        await self.blobs.apply_documents(session, Document.id.in_(obj_ids), -1)
+        return await super().delete_many(obj_ids, session=session)
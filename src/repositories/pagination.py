@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+SORTABLE_COLUMNS = ("id", "created_at")
+
+
+def encode_cursor(order_by: str, obj: Any) -> str:
+    value = getattr(obj, order_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([order_by, value, obj.id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(order_by: str, cursor: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        column, value, obj_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if column != order_by:
+        raise ValueError("Cursor does not match the requested ordering")
+    if column == "created_at":
+        value = datetime.fromisoformat(value)
+    return value, int(obj_id)
+
+
+def split_filters(filters: dict) -> List[Tuple[str, str, Any]]:
+    """Разбор фильтров вида column, column_from, column_to в (column, op, value)"""
+    parsed = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key.endswith("_from"):
+            parsed.append((key[:-len("_from")], ">=", value))
+        elif key.endswith("_to"):
+            parsed.append((key[:-len("_to")], "<=", value))
+        else:
+            parsed.append((key, "==", value))
+    return parsed
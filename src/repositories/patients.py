@@ -1,7 +1,49 @@
-from models.models import Patient
+from typing import List, Sequence
+
+from models.models import Patient, Document
 from .base import BaseRepository
+from .statistics import DocumentStatsRepository
+from .blobs import BlobRepository
+from db.db import connection
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class PatientRepository(BaseRepository):
     def __init__(self):
         super().__init__(Patient)
+        self.stats = DocumentStatsRepository()
+        self.blobs = BlobRepository()
+
+    @connection
+    async def get_with_documents(self, obj_id: int, session: AsyncSession) -> Patient:
+        result = await session.execute(
+            select(Patient)
+            .where(Patient.id == obj_id)
+            .options(selectinload(Patient.documents).defer(Document.data, raiseload=True))
+        )
+        return result.scalars().first()
+
+    @connection
+    async def document_ids(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        """
+        Документы пациентов, которые удалятся каскадом. Строки пациентов
+        блокируются до конца транзакции, чтобы новый документ не появился между
+        выборкой и удалением.
+        """
+        await session.execute(select(Patient.id).where(Patient.id.in_(obj_ids)).with_for_update())
+        result = await session.execute(select(Document.id).where(Document.patient_id.in_(obj_ids)))
+        return list(result.scalars())
+
+    @connection
+    async def delete(self, obj_id: int, session: AsyncSession) -> bool:
+        await self.stats.apply_documents(session, Document.patient_id == obj_id, -1)
+        await self.blobs.apply_documents(session, Document.patient_id == obj_id, -1)
+        return await super().delete(obj_id, session=session)
+
+    @connection
+    async def delete_many(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        await self.stats.apply_documents(session, Document.patient_id.in_(obj_ids), -1)
+        await self.blobs.apply_documents(session, Document.patient_id.in_(obj_ids), -1)
+        return await super().delete_many(obj_ids, session=session)
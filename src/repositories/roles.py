@@ -1,7 +1,41 @@
-from models.models import Role
+from typing import List, Sequence, Tuple
+
+from models.models import Role, User, Document
 from .base import BaseRepository
+from .users import UserRepository
+from db.db import connection
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class RoleRepository(BaseRepository):
     def __init__(self):
         super().__init__(Role)
+        self.users = UserRepository()
+
+    @connection
+    async def dependent_ids(self, obj_ids: Sequence[int], session: AsyncSession) -> Tuple[List[int], List[int]]:
+        """
+        Пользователи, которые удалятся каскадом вместе с ролями, и их документы
+        (у них обнулится автор). Строки ролей блокируются до конца транзакции.
+        """
+        await session.execute(select(Role.id).where(Role.id.in_(obj_ids)).with_for_update())
+        users = await session.execute(select(User.id).where(User.role_id.in_(obj_ids)).with_for_update())
+        user_ids = list(users.scalars())
+        documents = await session.execute(select(Document.id).where(Document.author_id.in_(user_ids)))
+        return user_ids, list(documents.scalars())
+
+    async def detach_document_stats(self, session: AsyncSession, obj_ids: Sequence[int]) -> None:
+        """Пользователи удаляются каскадом (ON DELETE CASCADE), их документы теряют автора"""
+        user_ids = select(User.id).where(User.role_id.in_(obj_ids))
+        await self.users.detach_document_stats(session, Document.author_id.in_(user_ids))
+
+    @connection
+    async def delete(self, obj_id: int, session: AsyncSession) -> bool:
+        await self.detach_document_stats(session, [obj_id])
+        return await super().delete(obj_id, session=session)
+
+    @connection
+    async def delete_many(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        await self.detach_document_stats(session, obj_ids)
+        return await super().delete_many(obj_ids, session=session)
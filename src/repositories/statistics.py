@@ -0,0 +1,152 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.db import connection, after_commit
+from models.models import Document, DocumentDailyStat, SubDirectories
+from cache.statistics import documents_stats_cache
+
+GROUP_COLUMNS = {
+    "author": (DocumentDailyStat.author_id, Document.author_id),
+    "subdirectory": (DocumentDailyStat.subdirectory_type, Document.subdirectory_type),
+    "patient": (None, Document.patient_id),
+}
+
+
+class DocumentStatsRepository:
+    model = DocumentDailyStat
+
+    def grouped_documents(self, where, author_override: Optional[int] = None):
+        author = literal(author_override) if author_override is not None else func.coalesce(Document.author_id, 0)
+        return (
+            select(
+                func.date(Document.created_at).label("day"),
+                author.label("author_id"),
+                Document.subdirectory_type,
+                func.count().label("count"),
+            )
+            .where(where)
+            .group_by(func.date(Document.created_at), author, Document.subdirectory_type)
+        )
+
+    async def apply_documents(
+        self,
+        session: AsyncSession,
+        where,
+        sign: int,
+        author_override: Optional[int] = None,
+    ) -> None:
+        """Добавляет (sign=1) или вычитает (sign=-1) документы, подходящие под условие where"""
+        if sign < 0:
+            await after_commit(documents_stats_cache.invalidate)
+        result = await session.execute(self.grouped_documents(where, author_override))
+        for row in result.all():
+            delta = sign * row.count
+            stmt = pg_insert(DocumentDailyStat).values(
+                day=row.day,
+                author_id=row.author_id,
+                subdirectory_type=row.subdirectory_type,
+                count=delta,
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    constraint="uq_documentdailystats_bucket",
+                    set_={"count": DocumentDailyStat.count + delta, "updated_at": func.now()},
+                )
+            )
+
+    @connection
+    async def rebuild(self, session: AsyncSession) -> None:
+        await after_commit(documents_stats_cache.invalidate)
+        await session.execute(delete(DocumentDailyStat))
+        grouped = self.grouped_documents(true()).subquery()
+        await session.execute(
+            insert(DocumentDailyStat).from_select(
+                ["day", "author_id", "subdirectory_type", "count"],
+                select(grouped.c.day, grouped.c.author_id, grouped.c.subdirectory_type, grouped.c["count"]),
+            )
+        )
+
+    @connection
+    async def series(
+        self,
+        start: date,
+        end: date,
+        session: AsyncSession,
+        granularity: str = "day",
+        group_by: Optional[str] = None,
+        filters: Optional[Dict] = None,
+    ) -> Dict[date, Dict[str, int]]:
+        """
+        Количество документов по интервалам [start, end) с группировкой.
+        Группировка по пациенту (или фильтр по нему) читается из documents
+        по диапазону created_at, остальное - из documentdailystats по диапазону day.
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value is not None}
+        use_rollup = group_by != "patient" and "patient_id" not in filters
+        if use_rollup:
+            model, time_column, count = DocumentDailyStat, DocumentDailyStat.day, func.sum(DocumentDailyStat.count)
+            lower, upper = start, end
+        else:
+            model, time_column, count = Document, Document.created_at, func.count(Document.id)
+            lower, upper = datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+        bucket = func.date_trunc(granularity, time_column).label("bucket")
+        columns = [bucket, count.label("count")]
+        group_column = None
+        if group_by:
+            group_column = GROUP_COLUMNS[group_by][0 if use_rollup else 1].label("group")
+            columns.append(group_column)
+
+        query = select(*columns).where(time_column >= lower, time_column < upper)
+        for key, value in filters.items():
+            query = query.where(getattr(model, key) == value)
+        query = query.group_by(bucket, *([group_column] if group_column is not None else []))
+
+        result = await session.execute(query)
+        series = defaultdict(dict)
+        for row in result.all():
+            group = row.group if group_column is not None else None
+            group = group.value if isinstance(group, SubDirectories) else group
+            key = "total" if group_column is None else str(group if group is not None else 0)
+            series[row.bucket.date()][key] = int(row.count)
+        return series
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(date_from: date, date_to: date, granularity: str) -> int:
+    """Число интервалов, которые вернёт iter_buckets, без построения списка"""
+    if date_from > date_to:
+        return 0
+    if granularity == "month":
+        return (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    days = (bucket_start(date_to, granularity) - bucket_start(date_from, granularity)).days
+    return days // (7 if granularity == "week" else 1) + 1
+
+
+def iter_buckets(date_from: date, date_to: date, granularity: str) -> List[date]:
+    buckets = []
+    current = bucket_start(date_from, granularity)
+    while current <= date_to:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
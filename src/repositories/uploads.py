@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import UploadSession
+from .base import BaseRepository
+from db.db import connection
+
+
+class UploadSessionRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(UploadSession)
+
+    @connection
+    async def get_by_key(self, key: str, session: AsyncSession) -> Optional[UploadSession]:
+        result = await session.execute(select(UploadSession).where(UploadSession.key == key))
+        return result.scalars().first()
+
+    @connection
+    async def advance(
+        self,
+        key: str,
+        offset: int,
+        parts: List[str],
+        written: int,
+        expires_at: datetime,
+        session: AsyncSession,
+    ) -> Optional[UploadSession]:
+        """Добавляет часть, только если смещение не изменилось с момента её приёма"""
+        result = await session.execute(
+            update(UploadSession)
+            .where(UploadSession.key == key, UploadSession.offset == offset)
+            .values(offset=offset + written, parts=parts, expires_at=expires_at)
+            .returning(UploadSession)
+        )
+        return result.scalars().first()
+
+    @connection
+    async def delete_by_key(self, key: str, session: AsyncSession) -> Optional[UploadSession]:
+        result = await session.execute(
+            delete(UploadSession).where(UploadSession.key == key).returning(UploadSession)
+        )
+        return result.scalars().first()
+
+    @connection
+    async def expired(self, now: datetime, limit: int, session: AsyncSession) -> List[str]:
+        result = await session.execute(
+            select(UploadSession.key)
+            .where(UploadSession.expires_at < now)
+            .order_by(UploadSession.expires_at)
+            .limit(limit)
+        )
+        return list(result.scalars())
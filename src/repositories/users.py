@@ -1,5 +1,8 @@
-from models.models import User
+from typing import List, Sequence
+
+from models.models import User, Document
 from .base import BaseRepository
+from .statistics import DocumentStatsRepository
 from db.db import connection
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 class UserRepository(BaseRepository):
     def __init__(self):
         super().__init__(User)
+        self.stats = DocumentStatsRepository()
 
     @connection
     async def get_by_name(self, login: str, session: AsyncSession) -> User:
@@ -15,3 +19,25 @@ class UserRepository(BaseRepository):
             select(User).where(User.login == login)
         )
         return result.scalars().first()
+
+    @connection
+    async def document_ids(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        """Документы, у которых удаление пользователей обнулит автора; строки пользователей блокируются"""
+        await session.execute(select(User.id).where(User.id.in_(obj_ids)).with_for_update())
+        result = await session.execute(select(Document.id).where(Document.author_id.in_(obj_ids)))
+        return list(result.scalars())
+
+    async def detach_document_stats(self, session: AsyncSession, where) -> None:
+        """documents.author_id обнуляется базой (SET NULL) - переносим счётчики на author_id = 0"""
+        await self.stats.apply_documents(session, where, -1)
+        await self.stats.apply_documents(session, where, 1, author_override=0)
+
+    @connection
+    async def delete(self, obj_id: int, session: AsyncSession) -> bool:
+        await self.detach_document_stats(session, Document.author_id == obj_id)
+        return await super().delete(obj_id, session=session)
+
+    @connection
+    async def delete_many(self, obj_ids: Sequence[int], session: AsyncSession) -> List[int]:
+        await self.detach_document_stats(session, Document.author_id.in_(obj_ids))
+        return await super().delete_many(obj_ids, session=session)
@@ -1,18 +1,104 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
-import json
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, date
+from typing import List, Dict, Any, Literal, Optional
 
 from db.db import get_async_session
-from models.models import Document
+from models.models import SubDirectories
+from repositories.statistics import DocumentStatsRepository, bucket_count, iter_buckets, next_bucket
+from schemas.analitics import DailyReportCountResponse
+from cache.statistics import documents_stats_cache
+from config import settings
 
 router = APIRouter(
     prefix="/statistics",
     tags=["statistics"]
 )
 
+stats_repository = DocumentStatsRepository()
+
+Granularity = Literal["day", "week", "month"]
+GroupBy = Literal["author", "patient", "subdirectory"]
+
+
+async def documents_series(
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    granularity: Granularity = "day",
+    group_by: Optional[GroupBy] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Количество документов по целым интервалам, покрывающим [date_from, date_to].
+    Завершённые интервалы кэшируются и повторно не пересчитываются.
+    """
+    today = datetime.now().date()
+    filters = filters or {}
+    buckets = iter_buckets(date_from, date_to, granularity)
+    series_key = ":".join(
+        [granularity, group_by or "-"]
+        + [f"{key}={getattr(value, 'value', value)}" for key, value in filters.items() if value is not None]
+    )
+
+    completed = [start for start in buckets if next_bucket(start, granularity) <= today]
+    version, values = await documents_stats_cache.get_many(series_key, completed)
+    missing = [start for start in buckets if start not in values]
+    if missing:
+        computed = await stats_repository.series(
+            missing[0],
+            next_bucket(missing[-1], granularity),
+            session=session,
+            granularity=granularity,
+            group_by=group_by,
+            filters=filters,
+        )
+        fresh = {start: computed.get(start, {}) for start in missing}
+        await documents_stats_cache.set_many(
+            version,
+            series_key,
+            {start: value for start, value in fresh.items() if start in completed},
+        )
+        values.update(fresh)
+
+    return [
+        {
+            "date": start.isoformat(),
+            "count": sum(values[start].values()),
+            **({"groups": values[start]} if group_by else {}),
+        }
+        for start in buckets
+    ]
+
+
+@router.get("/documents", response_model=List[DailyReportCountResponse], response_model_exclude_none=True)
+async def get_documents_stats(
+    date_from: date,
+    date_to: Optional[date] = None,
+    granularity: Granularity = "day",
+    group_by: Optional[GroupBy] = None,
+    author_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    subdirectory_type: Optional[SubDirectories] = None,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Количество созданных документов за произвольный период с разбивкой
+    по дням, неделям или месяцам и группировкой по автору, пациенту или папке.
+    Интервалы всегда целые: границы периода расширяются до начала/конца интервала.
+    """
+    date_to = date_to or datetime.now().date()
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    if bucket_count(date_from, date_to, granularity) > settings.stats_max_buckets:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No more than {settings.stats_max_buckets} {granularity} buckets per request",
+        )
+    filters = {"author_id": author_id, "patient_id": patient_id, "subdirectory_type": subdirectory_type}
+    return await documents_series(session, date_from, date_to, granularity, group_by, filters)
+
+
 @router.get("/documents/weekly", response_model=List[Dict[str, Any]])
 async def get_documents_weekly_stats(
     session: AsyncSession = Depends(get_async_session)
@@ -22,35 +108,7 @@ async def get_documents_weekly_stats(
     """
     today = datetime.now().date()
     seven_days_ago = today - timedelta(days=6)  
-    
-    query = (
-        select(
-            func.date(Document.created_at).label("date"),
-            func.count().label("count")
-        )
-        .where(func.date(Document.created_at) >= seven_days_ago)
-        .group_by(func.date(Document.created_at))
-        .order_by(func.date(Document.created_at))
-    )
-    
-    result = await session.execute(query)
-    data = result.all()
-    
-    stats = {}
-    for i in range(7):
-        date = seven_days_ago + timedelta(days=i)
-        stats[date.isoformat()] = 0
-    
-    for row in data:
-        date_str = row.date.isoformat()
-        stats[date_str] = row.count
-    
-    formatted_stats = [
-        {"date": date, "count": count} 
-        for date, count in stats.items()
-    ]
-    
-    return formatted_stats
+    return await documents_series(session, seven_days_ago, today)
 
 @router.get("/documents/weekly/user/{user_id}", response_model=List[Dict[str, Any]])
 async def get_user_documents_weekly_stats(
@@ -59,30 +117,4 @@ async def get_user_documents_weekly_stats(
 ):
     today = datetime.now().date()
     seven_days_ago = today - timedelta(days=6)
-    
-    query = (
-        select(
-            func.date(Document.created_at).label("date"),
-            func.count().label("count")
-        )
-        .where(
-            (func.date(Document.created_at) >= seven_days_ago) &
-            (Document.author_id == user_id)  
-        )
-        .group_by(func.date(Document.created_at))
-        .order_by(func.date(Document.created_at))
-    )
-    
-    result = await session.execute(query)
-    data = result.all()
-    
-    stats = {}
-    for i in range(7):
-        date = seven_days_ago + timedelta(days=i)
-        stats[date.isoformat()] = 0
-    
-    for row in data:
-        date_str = row.date.isoformat()
-        stats[date_str] = row.count
-    
-    return [{"date": k, "count": v} for k, v in stats.items()]
\ No newline at end of file
+    return await documents_series(session, seven_days_ago, today, filters={"author_id": user_id})
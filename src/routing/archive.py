@@ -0,0 +1,63 @@
+import asyncio
+import io
+import os
+import zipfile
+from typing import AsyncIterator, Callable, Iterable, Tuple
+
+ArchiveEntry = Tuple[zipfile.ZipInfo, Callable[[], AsyncIterator[bytes]]]
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Несмещаемый буфер: zipfile пишет data descriptor и не делает seek назад"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def unique_name(name: str, used: set) -> str:
+    candidate = name
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem} ({counter}){ext}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+async def zip_stream(entries: Iterable[ArchiveEntry]) -> AsyncIterator[bytes]:
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w") as archive:
+        for info, opener in entries:
+            # сжатие выполняется в потоке, чтобы не блокировать event loop
+            compressed = info.compress_type != zipfile.ZIP_STORED
+            with archive.open(info, mode="w", force_zip64=True) as target:
+                async for chunk in opener():
+                    if compressed:
+                        await asyncio.to_thread(target.write, chunk)
+                    else:
+                        target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
@@ -1,17 +1,21 @@
-from typing import List, Dict, Any, TypeVar, Generic, Type, Optional
-from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile, Form, Response
+from typing import List, Dict, Any, TypeVar, Generic, Type, Optional, Literal
+from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile, Form, Response, Query, Request, Body
 from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError
 from redis import asyncio as aioredis
-from fastapi_cache.decorator import cache
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from urllib.parse import quote
 import json
 import traceback
 from services.base import BaseService
+from auth.utils import PasswordHashingBusy
 from config import settings, logger
-from cache.utils import Base64Coder
-from .utils import get_russian_forms
+from cache.objects import ObjectCache
+from db.db import after_commit
+from repositories.pagination import encode_cursor
+from schemas.bulk import BulkItemResult, BulkDelete
+from .utils import get_russian_forms, no_filters
+from .files import file_response
+from .export import ExportFormat, export_response
 
 T = TypeVar('T', bound=BaseModel)  
 DB = TypeVar('DB', bound=BaseModel)  
@@ -24,34 +28,26 @@ def create_base_router(
     create_schema: Type[T],
     read_schema: Type[DB],
     update_schema: Type[U],
+    filter_schema: Optional[Type[BaseModel]] = None,
     object_name: str = "объект",
     gender: str = 'm',
     has_file_field: bool = False,
+    exportable: bool = False,
     file_field_name: str = "data"
 ):
     forms = get_russian_forms(object_name, gender)
     router = APIRouter(prefix=prefix, tags=tags)
     cache_prefix = prefix.strip("/")
     
-    def custom_key_builder(func, namespace: Optional[str] = None, *args, **kwargs):
-        namespace = namespace or f"{cache_prefix}"
-        prefix = f"{FastAPICache.get_prefix()}:fastapi_cache:{namespace}:"
-        module_path = func.__module__
-        function_name = func.__qualname__
-        if function_name == "get_all":
-            cache_key = f"{prefix}:{module_path}:{function_name}"
-        else:
-            cache_key = f"{prefix}:{module_path}:{function_name}"
-            arg_dict = kwargs
-            if args:
-                func_args = func.__code__.co_varnames
-                for i, arg_name in enumerate(func_args[1:]):  
-                    if i < len(args):
-                        arg_dict[arg_name] = args[i]
-            for key, value in arg_dict.items():
-                if key not in ["service", "session"]:
-                    cache_key += f":{key}:{str(value)}"
-        return cache_key.replace(" ", "_")
+    object_cache = ObjectCache(cache_prefix, read_schema)
+    file_fields = {"storage_key", "size", "checksum", "codec", "stored_size"} if has_file_field else set()
+
+    def check_bulk_size(items: List) -> None:
+        if len(items) > settings.bulk_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"No more than {settings.bulk_max_items} items per request",
+            )
 
     @router.get(
         "",
@@ -60,12 +56,33 @@ def create_base_router(
             500: {"description": "Internal server error"}
         },
         response_model=List[read_schema],
-        description=f"Получение списка всех {forms['genitive_plural']} в формате JSON.",
+        description=(
+            f"Получение списка {forms['genitive_plural']} в формате JSON. "
+            "Постраничная выдача по курсору: следующий курсор возвращается в заголовке X-Next-Cursor."
+        ),
     )
-    async def get_all(service: BaseService = Depends(service_dependency)) -> List[read_schema]:
+    async def get_all(
+        response: Response,
+        limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+        cursor: Optional[str] = None,
+        order_by: Literal["id", "created_at"] = "id",
+        order: Literal["asc", "desc"] = "asc",
+        filters = Depends(filter_schema or no_filters),
+        service: BaseService = Depends(service_dependency),
+    ) -> List[read_schema]:
         try:
-            objects = await service.get_all_objects()
+            objects = await service.get_all_objects(
+                filters=filters.model_dump(exclude_none=True) if filters else None,
+                cursor=cursor,
+                limit=limit,
+                order_by=order_by,
+                descending=order == "desc",
+            )
+            if len(objects) == limit:
+                response.headers["X-Next-Cursor"] = encode_cursor(order_by, objects[-1])
             return objects if objects else []
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except Exception as e:
             logger.error(f"Get all error: {traceback.format_exc()}")
             raise HTTPException(
@@ -73,6 +90,156 @@ def create_base_router(
                 detail=f"Failed to retrieve {forms['genitive_plural']}"
             )
 
+    if exportable:
+        @router.get(
+            "/export",
+            responses={
+                200: {"description": "NDJSON or CSV stream"},
+                500: {"description": "Internal server error"}
+            },
+            description=(
+                f"Потоковая выгрузка {forms['genitive_plural']} в NDJSON или CSV "
+                "с теми же фильтрами, что и у списка. Сжимается gzip при Accept-Encoding: gzip."
+            ),
+            response_class=Response,
+        )
+        async def export(
+            request: Request,
+            format: ExportFormat = "ndjson",
+            filters = Depends(filter_schema or no_filters),
+            service: BaseService = Depends(service_dependency),
+        ):
+            rows = service.stream_objects(filters.model_dump(exclude_none=True) if filters else None)
+            return export_response(request, rows, read_schema, format, cache_prefix)
+
+    if not has_file_field:
+        @router.post(
+            "/bulk",
+            response_model=List[BulkItemResult],
+            responses={
+                200: {"description": "Per-item results"},
+                409: {"description": "Batch rejected by the database"},
+                413: {"description": "Too many items"},
+                503: {"description": "Password hashing queue is full"},
+                500: {"description": "Internal server error"}
+            },
+            description=f"Массовое создание {forms['genitive_plural']} в одной транзакции.",
+        )
+        async def bulk_create(items: List[Dict[str, Any]] = Body(...), service = Depends(service_dependency)) -> List[BulkItemResult]:
+            check_bulk_size(items)
+            results, valid, positions = [], [], []
+            for index, item in enumerate(items):
+                try:
+                    valid.append(create_schema(**item).model_dump())
+                    positions.append(index)
+                except ValidationError as e:
+                    results.append(BulkItemResult(index=index, status="invalid", detail=e.errors()))
+            try:
+                created = await service.create_objects(valid)
+            except IntegrityError as e:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e.orig))
+            except PasswordHashingBusy:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy, try again later",
+                    headers={"Retry-After": "1"},
+                )
+            except Exception as e:
+                logger.error(f"Bulk create error: {traceback.format_exc()}")
+                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to create {forms['genitive_plural']}")
+            for index, obj in zip(positions, created):
+                results.append(BulkItemResult(index=index, id=obj.id, status="created"))
+
+            async def write_through():
+                for obj in created:
+                    await object_cache.write_through(obj)
+
+            await after_commit(write_through)
+            return sorted(results, key=lambda result: result.index)
+
+    @router.put(
+        "/bulk",
+        response_model=List[BulkItemResult],
+        responses={
+            200: {"description": "Per-item results"},
+            409: {"description": "Batch rejected by the database"},
+            413: {"description": "Too many items"},
+            503: {"description": "Password hashing queue is full"},
+            500: {"description": "Internal server error"}
+        },
+        description=f"Массовое обновление {forms['genitive_plural']} в одной транзакции. Каждый элемент содержит id.",
+    )
+    async def bulk_update(items: List[Dict[str, Any]] = Body(...), service = Depends(service_dependency)) -> List[BulkItemResult]:
+        check_bulk_size(items)
+        results, valid, positions = [], [], []
+        for index, item in enumerate(items):
+            obj_id = item.get("id")
+            if not isinstance(obj_id, int):
+                results.append(BulkItemResult(index=index, status="invalid", detail="id is required"))
+                continue
+            fields = {key: value for key, value in item.items() if key != "id" and key not in file_fields}
+            try:
+                update_data = update_schema(**fields).model_dump(exclude_unset=True)
+            except ValidationError as e:
+                results.append(BulkItemResult(index=index, id=obj_id, status="invalid", detail=e.errors()))
+                continue
+            valid.append({"id": obj_id, **update_data})
+            positions.append(index)
+        try:
+            existing = {obj.id for obj in await service.get_objects_by_ids([item["id"] for item in valid])}
+            updated = await service.update_objects([item for item in valid if item["id"] in existing])
+        except IntegrityError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e.orig))
+        except PasswordHashingBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        except Exception as e:
+            logger.error(f"Bulk update error: {traceback.format_exc()}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to update {forms['genitive_plural']}")
+        for index, item in zip(positions, valid):
+            if item["id"] in existing:
+                results.append(BulkItemResult(index=index, id=item["id"], status="updated"))
+            else:
+                results.append(BulkItemResult(index=index, id=item["id"], status="not_found"))
+
+        async def write_through():
+            for obj in updated:
+                await object_cache.write_through(obj)
+
+        await after_commit(write_through)
+        return sorted(results, key=lambda result: result.index)
+
+    @router.delete(
+        "/bulk",
+        response_model=List[BulkItemResult],
+        responses={
+            200: {"description": "Per-item results"},
+            413: {"description": "Too many items"},
+            500: {"description": "Internal server error"}
+        },
+        description=f"Массовое удаление {forms['genitive_plural']} в одной транзакции.",
+    )
+    async def bulk_delete(data: BulkDelete, service = Depends(service_dependency)) -> List[BulkItemResult]:
+        check_bulk_size(data.ids)
+        try:
+            deleted = set(await service.delete_objects(data.ids))
+        except Exception as e:
+            logger.error(f"Bulk delete error: {traceback.format_exc()}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to delete {forms['genitive_plural']}")
+
+        async def invalidate():
+            for obj_id in deleted:
+                await object_cache.invalidate(obj_id)
+
+        await after_commit(invalidate)
+        return [
+            BulkItemResult(index=index, id=obj_id, status="deleted" if obj_id in deleted else "not_found")
+            for index, obj_id in enumerate(data.ids)
+        ]
+
     if has_file_field:
         @router.post(
             "",
@@ -89,13 +256,13 @@ def create_base_router(
         async def create(file: UploadFile = File(...), data: str = Form(...), service = Depends(service_dependency)) -> read_schema:
             try:
                 data_dict = json.loads(data)
-                file_content = await file.read()
-                data_dict[file_field_name] = file_content
+                data_dict.update(await service.store_file(file))
                 try:
                     validated_data = create_schema(**data_dict)
                 except ValidationError as e:
                     raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors())
                 result = await service.create_object(validated_data)
+                await after_commit(lambda: object_cache.write_through(result))
                 return result
             except HTTPException:
                 raise
@@ -118,6 +285,7 @@ def create_base_router(
         async def create(data: create_schema, service = Depends(service_dependency)) -> read_schema:
             try:
                 obj = await service.create_object(data)
+                await after_commit(lambda: object_cache.write_through(obj))
                 return obj
             except ValueError as e:
                 logger.error(f"Validation error: {str(e)}")
@@ -136,12 +304,15 @@ def create_base_router(
         response_model=read_schema,
         description=f"Получение {forms['родительный']} по идентификатору.",
     )
-    @cache(expire=settings.cache_ttl, coder=Base64Coder, key_builder=custom_key_builder)
     async def get_by_id(obj_id: int, service: BaseService = Depends(service_dependency)) -> read_schema:
         try:
+            version, cached = await object_cache.get(obj_id)
+            if cached is not None:
+                return cached
             result = await service.get_object_by_id(obj_id)
             if not result:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{forms['именительный'].capitalize()} не {forms['найден']}")
+            await object_cache.set(obj_id, version, result)
             return result
         except HTTPException:
             raise
@@ -173,14 +344,17 @@ def create_base_router(
                         data_dict = json.loads(data)
                     except json.JSONDecodeError:
                         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON format")
+                data_dict = {key: value for key, value in data_dict.items() if key not in file_fields}
                 if file and file.filename:
-                    file_content = await file.read()
-                    data_dict[file_field_name] = file_content
+                    data_dict.update(await service.store_file(file))
                 try:
                     update_data = update_schema(**data_dict).dict(exclude_unset=True)
                 except ValidationError as e:
                     raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors())
                 result = await service.update_object(obj_id, update_data)
+                if not result:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{forms['именительный'].capitalize()} не {forms['найден']}")
+                await after_commit(lambda: object_cache.write_through(result))
                 return result
             except HTTPException:
                 raise
@@ -206,6 +380,7 @@ def create_base_router(
                 result = await service.update_object(obj_id, update_data)
                 if not result:
                     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{forms['именительный'].capitalize()} не {forms['найден']}")
+                await after_commit(lambda: object_cache.write_through(result))
                 return result
             except HTTPException:
                 raise
@@ -227,6 +402,7 @@ def create_base_router(
             success = await service.delete_object(obj_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{forms['именительный'].capitalize()} не {forms['найден']}")
+            await after_commit(lambda: object_cache.invalidate(obj_id))
             return {"detail": f"{forms['именительный'].capitalize()} успешно {forms['удален']}"}
         except HTTPException:
             raise
@@ -239,20 +415,38 @@ def create_base_router(
             "/{obj_id}/download",
             responses={
                 200: {"description": "File downloaded successfully"},
+                206: {"description": "Partial content"},
+                304: {"description": "Not modified"},
                 404: {"description": f"{forms['именительный'].capitalize()} не {forms['найден']}"},
+                416: {"description": "Range not satisfiable"},
                 500: {"description": "Internal server error"}
             },
-            description=f"Скачивание файла {forms['родительный']}.",
+            description=(
+                f"Скачивание файла {forms['родительный']}. "
+                "Поддерживаются Range, If-Range, If-None-Match и If-Modified-Since."
+            ),
             response_class=Response
         )
-        @cache(expire=settings.cache_ttl, coder=Base64Coder, key_builder=custom_key_builder)
-        async def download_file(obj_id: int, service = Depends(service_dependency)):
+        async def download_file(obj_id: int, request: Request, service = Depends(service_dependency)):
             try:
                 result = await service.get_object_by_id(obj_id)
                 if not result:
                     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{forms['именительный'].capitalize()} не {forms['найден']}")
-                file_data = getattr(result, file_field_name)
                 file_name = getattr(result, "name", f"{object_name}_{obj_id}")
+                if result.storage_key:
+                    return file_response(
+                        request,
+                        lambda start, end: service.open_file(result, start, end),
+                        size=result.size,
+                        file_name=file_name,
+                        checksum=result.checksum,
+                        last_modified=result.updated_at,
+                        path=service.file_path(result),
+                        encoding=result.codec,
+                        encoded_size=result.stored_size,
+                        encoded_opener=lambda: service.open_stored_file(result),
+                    )
+                file_data = await service.read_file(result)
                 encoded_file_name = quote(file_name)
                 return Response(
                     content=file_data,
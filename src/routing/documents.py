@@ -1,6 +1,14 @@
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
 from .base import create_base_router
+from .files import is_not_modified
 from schemas.documents import *
 from depends import get_document_service
+from services.documents import DocumentService
+from storage.thumbnails import THUMBNAIL_MEDIA_TYPE
+from db.db import after_commit
 
 router = create_base_router(
     prefix="/documents",
@@ -9,8 +17,95 @@ router = create_base_router(
     create_schema=DocumentCreate,
     read_schema=DocumentInDB,
     update_schema=DocumentUpdate,
+    filter_schema=DocumentFilter,
     object_name="документ",
     has_file_field=True,  
     gender='m',
+    exportable=True,
     file_field_name="data"  
-)
\ No newline at end of file
+)
+
+
+@router.get(
+    "/{obj_id}/thumbnail",
+    responses={
+        200: {"content": {THUMBNAIL_MEDIA_TYPE: {}}, "description": "Миниатюра документа"},
+        304: {"description": "Миниатюра не изменилась"},
+        404: {"description": "Документ или миниатюра не найдены"},
+    },
+    description=(
+        "Уменьшенная копия фото или кадр видео для галереи. "
+        "С параметром v=thumbnail_key ответ кэшируется браузером без ограничения срока."
+    ),
+    response_class=Response,
+)
+async def get_thumbnail(
+    obj_id: int,
+    request: Request,
+    v: Optional[str] = None,
+    service: DocumentService = Depends(get_document_service),
+):
+    document = await service.get_object_by_id(obj_id)
+    if not document:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Документ не найден")
+    if not document.thumbnail_key:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Миниатюра недоступна")
+
+    etag = f'"{document.thumbnail_key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            "private, max-age=31536000, immutable"
+            if v == document.thumbnail_key
+            else "private, max-age=300"
+        ),
+    }
+    if is_not_modified(request, etag, None):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=await service.read_thumbnail(document),
+        media_type=THUMBNAIL_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+@router.post(
+    "/checksums",
+    response_model=List[StoredContent],
+    responses={
+        200: {"description": "Содержимое из запроса, которое уже есть в хранилище"},
+        422: {"description": "Validation error"},
+    },
+    description=(
+        "Проверка sha256 файлов перед загрузкой. Для найденного содержимого "
+        "документ создаётся через /documents/from-checksum без передачи файла."
+    ),
+)
+async def lookup_checksums(
+    data: ChecksumLookup,
+    service: DocumentService = Depends(get_document_service),
+):
+    blobs = await service.find_files(data.checksums)
+    return [StoredContent(checksum=blob.key, size=blob.size) for blob in blobs]
+
+
+@router.post(
+    "/from-checksum",
+    response_model=DocumentInDB,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "Документ успешно создан"},
+        404: {"description": "Содержимое с такой контрольной суммой не найдено"},
+        422: {"description": "Validation error"},
+    },
+    description="Создание документа из уже загруженного содержимого по его sha256.",
+)
+async def create_from_checksum(
+    data: DocumentFromChecksum,
+    service: DocumentService = Depends(get_document_service),
+) -> DocumentInDB:
+    document = await service.create_from_checksum(data.model_dump())
+    if not document:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Содержимое не найдено, файл нужно загрузить")
+    await after_commit(lambda: service.object_cache.write_through(document))
+    return document
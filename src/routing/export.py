@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Literal, Type
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from .files import accepts_encoding
+
+ExportFormat = Literal["ndjson", "csv"]
+
+FLUSH_SIZE = 64 * 1024
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def encode_rows(rows: AsyncIterator, schema: Type[BaseModel], fmt: ExportFormat) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        fields = list(schema.model_fields)
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+
+    async for row in rows:
+        record = jsonable_encoder(schema.model_validate(row))
+        if writer is not None:
+            writer.writerow(record)
+        else:
+            buffer.write(json.dumps(record, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    request: Request,
+    rows: AsyncIterator,
+    schema: Type[BaseModel],
+    fmt: ExportFormat,
+    file_name: str,
+) -> StreamingResponse:
+    body = encode_rows(rows, schema, fmt)
+    headers = {"Content-Disposition": f"attachment; filename={file_name}.{fmt}"}
+    if accepts_encoding(request, "gzip"):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,236 @@
+import base64
+import hashlib
+import mimetypes
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+
+from config import settings
+
+ByteRange = Tuple[int, int]
+# больше диапазонов в одном запросе не обслуживаем: отдаём файл целиком
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[List[ByteRange]]:
+    """
+    Разбор заголовка Range в список диапазонов (end - включительно).
+    Пересекающиеся и смежные диапазоны объединяются, чтобы запрос вида
+    bytes=0-,0-,... не отдавал файл многократно.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+    ranges = []
+    for part in parts:
+        start, sep, end = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start:
+                length = int(end)
+                if length == 0 or size == 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+            else:
+                first = int(start)
+                # синтаксическая ошибка - только явный конец меньше начала
+                if end and int(end) < first:
+                    return None
+                if first >= size:
+                    continue
+                last = int(end) if end else size - 1
+                ranges.append((first, min(last, size - 1)))
+        except ValueError:
+            return None
+    if not ranges:
+        raise RangeNotSatisfiable()
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def range_allowed(request: Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and if_range == etag
+    return last_modified is not None and if_range == http_date(last_modified)
+
+
+def accepts_encoding(request: Request, encoding: str) -> bool:
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() != encoding:
+            continue
+        quality = params.strip().removeprefix("q=")
+        try:
+            return not quality or float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def accel_redirect_uri(path: Path) -> str:
+    """
+    Внутренний адрес файла для X-Accel-Redirect с подписью в формате nginx secure_link:
+
+        location /protected-files/ {
+            internal;
+            alias /storage_data/;
+            secure_link $arg_md5,$arg_expires;
+            secure_link_md5 "$secure_link_expires$uri <DOWNLOAD_ACCEL_SECRET>";
+            if ($secure_link = "") { return 403; }
+            if ($secure_link = "0") { return 410; }
+        }
+    """
+    relative = path.relative_to(settings.storage_path).as_posix()
+    uri = f"{settings.download_accel_location.rstrip('/')}/{relative}"
+    expires = int(time.time()) + settings.download_accel_ttl
+    digest = hashlib.md5(f"{expires}{uri} {settings.download_accel_secret}".encode()).digest()
+    signature = base64.urlsafe_b64encode(digest).decode().rstrip("=")
+    return f"{uri}?md5={signature}&expires={expires}"
+
+
+def file_response(
+    request: Request,
+    opener: Callable[[int, Optional[int]], AsyncIterator[bytes]],
+    size: int,
+    file_name: str,
+    checksum: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    path: Optional[Path] = None,
+    encoding: Optional[str] = None,
+    encoded_size: Optional[int] = None,
+    encoded_opener: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+) -> Response:
+    """
+    Ответ со скачиваемым файлом. Если файл хранится сжатым (encoding) и клиент
+    принимает это сжатие, без Range отдаётся хранимый объект как есть
+    с Content-Encoding, иначе содержимое распаковывается на лету.
+    """
+    etag = f'"{checksum}"' if checksum else None
+    content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={quote(file_name)}",
+    }
+    if encoding:
+        headers["Vary"] = "Accept-Encoding"
+        if encoded_opener is not None and not request.headers.get("range") and accepts_encoding(request, encoding):
+            etag = f'"{checksum}-{encoding}"' if checksum else None
+            headers["Content-Encoding"] = encoding
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if "Content-Encoding" in headers:
+        headers["Content-Length"] = str(encoded_size)
+        return StreamingResponse(encoded_opener(), media_type=content_type, headers=headers)
+
+    if path is not None and settings.download_mode == "x-accel":
+        headers["X-Accel-Redirect"] = accel_redirect_uri(path)
+        return Response(media_type=content_type, headers=headers)
+
+    range_header = request.headers.get("range")
+    if path is not None and settings.download_mode == "sendfile" and not range_header:
+        return FileResponse(path, media_type=content_type, headers=headers)
+
+    ranges = None
+    if range_header and range_allowed(request, etag, last_modified):
+        try:
+            ranges = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    if not ranges:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(opener(0, None), media_type=content_type, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            opener(start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=content_type,
+            headers=headers,
+        )
+
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        (
+            f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+    length = sum(len(head) + end - start + 1 for head, (start, end) in zip(part_headers, ranges))
+    length += 2 * (len(ranges) - 1) + len(closing)
+
+    async def multipart_body():
+        for index, (head, (start, end)) in enumerate(zip(part_headers, ranges)):
+            yield (b"\r\n" if index else b"") + head
+            async for chunk in opener(start, end):
+                yield chunk
+        yield closing
+
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        multipart_body(),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
@@ -1,6 +1,16 @@
+import zipfile
+from urllib.parse import quote
+
+from fastapi import Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
 from .base import create_base_router
+from .archive import unique_name, zip_stream
 from schemas.patients import *
-from depends import get_patient_service
+from models.models import SubDirectories
+from depends import get_patient_service, get_document_service
+from services.patients import PatientService
+from services.documents import DocumentService
 
 router = create_base_router(
     prefix="/patients",
@@ -9,6 +19,47 @@ router = create_base_router(
     create_schema=PatientCreate,
     read_schema=PatientInDB,
     update_schema=PatientUpdate,
+    filter_schema=PatientFilter,
     object_name="пациент",
     gender='m',
-)
\ No newline at end of file
+    exportable=True,
+)
+
+
+@router.get(
+    "/{obj_id}/documents/archive",
+    responses={
+        200: {"description": "ZIP archive stream"},
+        404: {"description": "Пациент не найден"},
+    },
+    description="Скачивание всех документов пациента одним ZIP-архивом, разложенным по папкам.",
+    response_class=StreamingResponse,
+)
+async def download_documents_archive(
+    obj_id: int,
+    service: PatientService = Depends(get_patient_service),
+    document_service: DocumentService = Depends(get_document_service),
+):
+    patient = await service.get_object_with_documents(obj_id)
+    if not patient:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пациент не найден")
+
+    used_names = set()
+    entries = []
+    for document in sorted(patient.documents, key=lambda doc: (doc.subdirectory_type.value, doc.created_at)):
+        info = zipfile.ZipInfo(
+            unique_name(f"{document.subdirectory_type.value}/{document.name}", used_names),
+            date_time=document.created_at.timetuple()[:6],
+        )
+        info.compress_type = (
+            zipfile.ZIP_STORED
+            if document.subdirectory_type == SubDirectories.PHOTOS_AND_VIDEOS
+            else zipfile.ZIP_DEFLATED
+        )
+        entries.append((info, lambda document=document: document_service.stream_file(document)))
+
+    return StreamingResponse(
+        zip_stream(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={quote(patient.fio)}.zip"},
+    )
@@ -9,6 +9,7 @@ router = create_base_router(
     create_schema=RoleCreate,
     read_schema=RoleInDB,
     update_schema=RoleUpdate,
+    filter_schema=RoleFilter,
     object_name="роль",
     gender='f',
 )
\ No newline at end of file
@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+
+from auth.auth import get_current_user
+from db.db import after_commit
+from depends import get_upload_service
+from models.models import User
+from schemas.documents import DocumentBase, DocumentInDB
+from schemas.uploads import UploadSessionCreate, UploadSessionInDB
+from services.uploads import (
+    UploadService,
+    UploadOffsetMismatch,
+    UploadTooLarge,
+    UploadIncomplete,
+    UploadChecksumMismatch,
+)
+
+router = APIRouter(
+    prefix="/uploads",
+    tags=["uploads"]
+)
+
+NOT_FOUND = "Загрузка не найдена или истекла"
+
+
+@router.post(
+    "",
+    response_model=UploadSessionInDB,
+    status_code=status.HTTP_201_CREATED,
+    description="Создание сессии загрузки файла частями.",
+)
+async def create_upload(
+    data: UploadSessionCreate,
+    user: User = Depends(get_current_user),
+    service: UploadService = Depends(get_upload_service),
+):
+    return await service.create_upload(user.id, data.size, data.checksum)
+
+
+@router.get(
+    "/{upload_key}",
+    response_model=UploadSessionInDB,
+    responses={404: {"description": NOT_FOUND}},
+    description="Текущее смещение загрузки: с него клиент продолжает передачу после обрыва.",
+)
+async def get_upload(
+    upload_key: str,
+    user: User = Depends(get_current_user),
+    service: UploadService = Depends(get_upload_service),
+):
+    upload = await service.get_upload(upload_key, user.id)
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=NOT_FOUND)
+    return upload
+
+
+@router.patch(
+    "/{upload_key}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        204: {"description": "Часть принята, новое смещение в заголовке Upload-Offset"},
+        404: {"description": NOT_FOUND},
+        409: {"description": "Смещение не совпадает с принятым, актуальное в заголовке Upload-Offset"},
+        413: {"description": "Часть больше допустимого размера или выходит за размер файла"},
+    },
+    description="Передача очередной части файла (тело запроса - байты) начиная со смещения Upload-Offset.",
+)
+async def append_upload(
+    upload_key: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    user: User = Depends(get_current_user),
+    service: UploadService = Depends(get_upload_service),
+):
+    try:
+        upload = await service.append_chunk(upload_key, user.id, upload_offset, request.stream())
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload offset mismatch",
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Chunk is too large")
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=NOT_FOUND)
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={"Upload-Offset": str(upload.offset)},
+    )
+
+
+@router.post(
+    "/{upload_key}/complete",
+    response_model=DocumentInDB,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        404: {"description": NOT_FOUND},
+        409: {"description": "Файл передан не полностью"},
+        422: {"description": "Контрольная сумма не совпадает"},
+    },
+    description="Завершение загрузки: собранный файл сохраняется и создаётся документ.",
+)
+async def complete_upload(
+    upload_key: str,
+    data: DocumentBase,
+    user: User = Depends(get_current_user),
+    service: UploadService = Depends(get_upload_service),
+) -> DocumentInDB:
+    try:
+        document = await service.complete_upload(upload_key, user.id, data.model_dump())
+    except UploadIncomplete as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is incomplete",
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadChecksumMismatch:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Checksum mismatch")
+    if not document:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=NOT_FOUND)
+    await after_commit(lambda: service.document_service.object_cache.write_through(document))
+    return document
+
+
+@router.delete(
+    "/{upload_key}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={404: {"description": NOT_FOUND}},
+    description="Отмена загрузки и удаление принятых частей.",
+)
+async def abort_upload(
+    upload_key: str,
+    user: User = Depends(get_current_user),
+    service: UploadService = Depends(get_upload_service),
+):
+    if not await service.abort_upload(upload_key, user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=NOT_FOUND)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
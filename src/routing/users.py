@@ -9,6 +9,7 @@ router = create_base_router(
     create_schema=UserCreate,
     read_schema=UserInDB,
     update_schema=UserUpdate,
+    filter_schema=UserFilter,
     object_name="пользователь",
     gender='m',
 )
\ No newline at end of file
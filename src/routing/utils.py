@@ -1,5 +1,10 @@
 from typing import Dict
 
+
+def no_filters() -> None:
+    return None
+
+
 def get_russian_forms(object_name: str, gender: str) -> Dict[str, str]:
     forms = {
         'm': {
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from datetime import date
+from typing import Dict, Optional
 
 class DailyReportCountResponse(BaseModel):
     date: date
-    count: int
\ No newline at end of file
+    count: int
+    groups: Optional[Dict[str, int]] = None
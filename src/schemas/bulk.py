@@ -0,0 +1,13 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[Any] = None
+
+
+class BulkDelete(BaseModel):
+    ids: List[int]
@@ -1,9 +1,12 @@
-from typing import Optional
-from pydantic import BaseModel, constr, validator
+from typing import List, Optional
+from pydantic import BaseModel, Field, constr, validator
 from datetime import datetime
 from urllib.parse import quote
 
 from models.models import SubDirectories
+from config import settings
+
+Checksum = constr(pattern=r"^[0-9a-f]{64}$")
 class DocumentBase(BaseModel):
     name: str
     patient_id: int
@@ -12,7 +15,11 @@ class DocumentBase(BaseModel):
 
 
 class DocumentCreate(DocumentBase):
-    data: bytes
+    storage_key: str
+    size: int
+    checksum: str
+    codec: Optional[str] = None
+    stored_size: Optional[int] = None
 
 
 class DocumentUpdate(DocumentBase):
@@ -20,13 +27,41 @@ class DocumentUpdate(DocumentBase):
     patient_id: Optional[int] = None
     subdirectory_type: Optional[SubDirectories] = None
     author_id: Optional[int] = None
-    data: Optional[bytes] = None
+    storage_key: Optional[str] = None
+    size: Optional[int] = None
+    checksum: Optional[str] = None
+    codec: Optional[str] = None
+    stored_size: Optional[int] = None
 
 
 class DocumentInDB(DocumentBase):
     id: int
+    size: Optional[int] = None
+    checksum: Optional[str] = None
+    thumbnail_key: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+
+class DocumentFilter(BaseModel):
+    patient_id: Optional[int] = None
+    subdirectory_type: Optional[SubDirectories] = None
+    author_id: Optional[int] = None
+    created_at_from: Optional[datetime] = None
+    created_at_to: Optional[datetime] = None
+
+
+class DocumentFromChecksum(DocumentBase):
+    checksum: Checksum
+
+
+class ChecksumLookup(BaseModel):
+    checksums: List[Checksum] = Field(..., min_length=1, max_length=settings.bulk_max_items)
+
+
+class StoredContent(BaseModel):
+    checksum: str
+    size: int
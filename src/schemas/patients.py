@@ -26,3 +26,10 @@ class PatientInDB(PatientBase):
     class Config:
         from_attributes = True
 
+
+class PatientFilter(BaseModel):
+    age: Optional[int] = None
+    age_from: Optional[int] = None
+    age_to: Optional[int] = None
+    created_at_from: Optional[datetime] = None
+    created_at_to: Optional[datetime] = None
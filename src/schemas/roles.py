@@ -24,3 +24,9 @@ class RoleInDB(RoleBase):
 
     class Config:
         from_attributes = True
+
+
+class RoleFilter(BaseModel):
+    name: Optional[str] = None
+    created_at_from: Optional[datetime] = None
+    created_at_to: Optional[datetime] = None
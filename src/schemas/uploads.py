@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, Field, constr
+from datetime import datetime
+
+from config import settings
+
+
+class UploadSessionCreate(BaseModel):
+    size: int = Field(..., gt=0, le=settings.upload_max_size)
+    checksum: Optional[constr(pattern=r"^[0-9a-f]{64}$")] = None
+
+
+class UploadSessionInDB(BaseModel):
+    key: str
+    size: int
+    offset: int
+    expires_at: datetime
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,4 @@
 from pydantic import BaseModel, EmailStr, constr, field_validator, ValidationError, validator
-import bcrypt
 
 from datetime import datetime
 from typing import Optional
@@ -14,12 +13,6 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: constr(min_length=6, max_length=64)
 
-    @validator('password')
-    def hash_password(cls, password: str) -> bytes:
-        salt = bcrypt.gensalt()
-        pwd_bytes: bytes = password.encode()
-        return bcrypt.hashpw(pwd_bytes, salt)
-
 
 class UserUpdate(UserBase):
     fio: Optional[constr(min_length=12, max_length=255)] = None
@@ -28,12 +21,6 @@ class UserUpdate(UserBase):
     role_id: Optional[int] = None
     active: Optional[bool] = None
 
-    @validator('password')
-    def hash_password(cls, password: str) -> bytes:
-        salt = bcrypt.gensalt()
-        pwd_bytes: bytes = password.encode()
-        return bcrypt.hashpw(pwd_bytes, salt)
-
 
 class UserInDB(UserBase):
     id: int
@@ -43,3 +30,11 @@ class UserInDB(UserBase):
 
     class Config:
         from_attributes = True
+
+
+class UserFilter(BaseModel):
+    login: Optional[str] = None
+    role_id: Optional[int] = None
+    active: Optional[bool] = None
+    created_at_from: Optional[datetime] = None
+    created_at_to: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, TypeVar, Generic
+from typing import AsyncIterator, List, Dict, Optional, TypeVar, Generic
 
 T = TypeVar("T")
 
@@ -7,8 +7,11 @@ class BaseService(ABC, Generic[T]):
     def __init__(self, repository: T):
         self.repository = repository
 
-    async def get_all_objects(self) -> List[T]:
-        return await self.repository.get_all()
+    async def get_all_objects(self, **params) -> List[T]:
+        return await self.repository.get_all(**params)
+
+    def stream_objects(self, filters: Optional[Dict] = None) -> AsyncIterator[T]:
+        return self.repository.stream_all(filters)
 
     async def create_object(self, data: Dict) -> T:
         return await self.repository.create(data)
@@ -21,3 +24,15 @@ class BaseService(ABC, Generic[T]):
 
     async def delete_object(self, id: int) -> bool:
         return await self.repository.delete(id)
+
+    async def get_objects_by_ids(self, ids: List[int]) -> List[T]:
+        return await self.repository.get_by_ids(ids)
+
+    async def create_objects(self, items: List[Dict]) -> List[T]:
+        return await self.repository.create_many(items)
+
+    async def update_objects(self, items: List[Dict]) -> List[T]:
+        return await self.repository.update_many(items)
+
+    async def delete_objects(self, ids: List[int]) -> List[int]:
+        return await self.repository.delete_many(ids)
@@ -1,7 +1,189 @@
+import asyncio
+import contextvars
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set
+from fastapi import UploadFile
+
 from repositories.documents import DocumentRepository
+from storage.base import BlobStore
+from cache.files import FileCache
+from storage.utils import iter_bytes, iter_upload, write_file
+from storage.thumbnails import thumbnail_kind, render_image, render_video_poster
+from cache.objects import ObjectCache
+from schemas.documents import DocumentInDB
+from models.models import Blob, Document, SubDirectories
+from metrics.metrics import DEDUPLICATED_UPLOADS, DEDUPLICATED_BYTES
+from db.db import unit_of_work, after_commit
+from config import settings, logger
 from .base import BaseService
 
 
 class DocumentService(BaseService):
-    def __init__(self, repository: DocumentRepository):
+    def __init__(
+        self,
+        repository: DocumentRepository,
+        blob_store: BlobStore,
+        file_cache: Optional[FileCache] = None,
+    ):
         super().__init__(repository)
+        self.blob_store = blob_store
+        self.file_cache = file_cache
+        self.object_cache = ObjectCache("documents", DocumentInDB)
+        self.thumbnail_slots = asyncio.Semaphore(settings.thumbnail_workers)
+        self.thumbnail_tasks: Set[asyncio.Task] = set()
+
+    async def store_file(self, file: UploadFile) -> Dict:
+        blob = await self.blob_store.save(iter_upload(file), claim=self.claim_file)
+        return blob.to_dict()
+
+    async def claim_file(self, key: str) -> None:
+        """
+        Фиксирует запись содержимого отдельной транзакцией до того, как хранилище
+        переиспользует объект с тем же ключом. Содержимое, на которое так и не
+        сослался документ, удалит collect_unused_files после grace-периода.
+        """
+        async with unit_of_work():
+            await self.repository.blobs.claim(key)
+
+    async def find_files(self, checksums: List[str]) -> List[Blob]:
+        return await self.repository.blobs.get_by_keys(checksums)
+
+    async def create_from_checksum(self, data: Dict) -> Optional[Document]:
+        """Создание документа из уже загруженного содержимого без повторной загрузки"""
+        blobs = await self.repository.blobs.get_by_keys([data["checksum"]], lock=True)
+        if not blobs:
+            return None
+        blob = blobs[0]
+        document = await self.create_object({
+            **data,
+            "storage_key": blob.key,
+            "size": blob.size,
+            "checksum": blob.key,
+            "codec": blob.codec,
+            "stored_size": blob.stored_size,
+        })
+        DEDUPLICATED_UPLOADS.inc()
+        DEDUPLICATED_BYTES.inc(blob.size)
+        return document
+
+    async def collect_unused_files(
+        self,
+        grace: float = settings.blob_gc_grace,
+        limit: int = settings.blob_gc_batch_size,
+    ) -> int:
+        older_than = datetime.now() - timedelta(seconds=grace)
+        keys = await self.repository.blobs.unused(older_than, limit)
+        for key in keys:
+            try:
+                # блокировка записи не даёт claim_file переиспользовать объект, пока он удаляется
+                async with unit_of_work():
+                    if not await self.repository.blobs.lock_unused(key, older_than):
+                        continue
+                    if await self.repository.count_by_storage_key(key):
+                        continue
+                    await self.blob_store.delete(key)
+                    await self.repository.blobs.forget(key)
+            except Exception as e:
+                logger.error(f"Failed to discard blob {key}: {e}")
+        return len(keys)
+
+    def open_file(self, document: Document, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        source = self.blob_store.open(document.storage_key, start, end, document.codec)
+        if self.file_cache is None:
+            return source
+        return self.file_cache.open(document.storage_key, document.size, source, start, end)
+
+    def open_stored_file(self, document: Document) -> AsyncIterator[bytes]:
+        return self.blob_store.open_stored(document.storage_key, document.codec)
+
+    def file_path(self, document: Document) -> Optional[Path]:
+        if not document.storage_key or document.codec:
+            return None
+        return self.blob_store.local_path(document.storage_key)
+
+    async def stream_file(self, document: Document) -> AsyncIterator[bytes]:
+        if document.storage_key:
+            async for chunk in self.open_file(document):
+                yield chunk
+        else:
+            yield await self.read_file(document)
+
+    async def read_file(self, document: Document) -> bytes:
+        if document.storage_key:
+            return await self.blob_store.read(document.storage_key, document.codec)
+        legacy = await self.repository.get_by_id(document.id, with_deferred=True)
+        return legacy.data
+
+    async def read_thumbnail(self, document: Document) -> bytes:
+        return await self.blob_store.read(document.thumbnail_key)
+
+    async def render_thumbnail(self, document: Document) -> Optional[bytes]:
+        kind = thumbnail_kind(document.name)
+        if kind is None or (document.size or 0) > settings.thumbnail_max_source_size:
+            return None
+        if kind == "image":
+            return await asyncio.to_thread(render_image, await self.read_file(document))
+        path = self.file_path(document)
+        if path is not None:
+            return await render_video_poster(path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "source"
+            await write_file(path, self.open_file(document))
+            return await render_video_poster(path)
+
+    async def generate_thumbnail(self, document_id: int) -> None:
+        """Создаёт миниатюру документа; пустой ключ означает, что миниатюра невозможна"""
+        document = await self.repository.get_by_id(document_id)
+        if not document or not document.storage_key or document.thumbnail_key is not None:
+            return
+        async with self.thumbnail_slots:
+            data = await self.render_thumbnail(document)
+        thumbnail_key = ""
+        if data:
+            blob = await self.blob_store.save(iter_bytes(data), compress=False, claim=self.claim_file)
+            thumbnail_key = blob.storage_key
+        async with unit_of_work():
+            stored = await self.repository.set_thumbnail(document.id, document.storage_key, thumbnail_key)
+        if stored:
+            await self.object_cache.invalidate(document.id)
+
+    async def generate_missing_thumbnails(self, limit: int = settings.thumbnail_batch_size) -> int:
+        ids = await self.repository.pending_thumbnails(limit)
+        for document_id in ids:
+            try:
+                await self.generate_thumbnail(document_id)
+            except Exception as e:
+                logger.error(f"Thumbnail generation failed for document {document_id}: {e}")
+        return len(ids)
+
+    async def schedule_thumbnail(self, document: Document) -> None:
+        if document.subdirectory_type != SubDirectories.PHOTOS_AND_VIDEOS or not document.storage_key:
+            return
+
+        async def generate():
+            try:
+                await self.generate_thumbnail(document.id)
+            except Exception as e:
+                logger.error(f"Thumbnail generation failed for document {document.id}: {e}")
+
+        # пустой контекст: задача не должна подхватить единицу работы завершившегося запроса
+        task = asyncio.create_task(generate(), context=contextvars.Context())
+        self.thumbnail_tasks.add(task)
+        task.add_done_callback(self.thumbnail_tasks.discard)
+
+    async def create_object(self, data: Dict) -> Document:
+        result = await super().create_object(data)
+        await after_commit(lambda: self.schedule_thumbnail(result))
+        return result
+
+    async def update_object(self, id: int, data: Dict) -> Document:
+        new_key = data.get("storage_key")
+        existing = await self.repository.get_by_id(id) if new_key else None
+        if existing and existing.storage_key != new_key:
+            data = {**data, "thumbnail_key": None}
+        result = await super().update_object(id, data)
+        if result and result.thumbnail_key is None:
+            await after_commit(lambda: self.schedule_thumbnail(result))
+        return result
@@ -1,7 +1,31 @@
+from typing import List
+
 from repositories.patients import PatientRepository
+from models.models import Patient
+from cache.objects import ObjectCache
+from schemas.documents import DocumentInDB
+from db.db import after_commit
 from .base import BaseService
 
 
 class PatientService(BaseService):
     def __init__(self, repository: PatientRepository):
         super().__init__(repository)
+        self.document_cache = ObjectCache("documents", DocumentInDB)
+
+    async def get_object_with_documents(self, id: int) -> Patient:
+        return await self.repository.get_with_documents(id)
+
+    async def delete_object(self, id: int) -> bool:
+        document_ids = await self.repository.document_ids([id])
+        success = await super().delete_object(id)
+        if success and document_ids:
+            await after_commit(lambda: self.document_cache.invalidate_many(document_ids))
+        return success
+
+    async def delete_objects(self, ids: List[int]) -> List[int]:
+        document_ids = await self.repository.document_ids(ids)
+        deleted = await super().delete_objects(ids)
+        if deleted and document_ids:
+            await after_commit(lambda: self.document_cache.invalidate_many(document_ids))
+        return deleted
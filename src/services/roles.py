@@ -1,7 +1,33 @@
+from typing import List
+
 from repositories.roles import RoleRepository
+from cache.objects import ObjectCache
+from schemas.documents import DocumentInDB
+from schemas.users import UserInDB
+from db.db import after_commit
 from .base import BaseService
 
 
 class RoleService(BaseService):
     def __init__(self, repository: RoleRepository):
         super().__init__(repository)
+        self.user_cache = ObjectCache("users", UserInDB)
+        self.document_cache = ObjectCache("documents", DocumentInDB)
+
+    async def invalidate_dependents(self, user_ids: List[int], document_ids: List[int]) -> None:
+        await self.user_cache.invalidate_many(user_ids)
+        await self.document_cache.invalidate_many(document_ids)
+
+    async def delete_object(self, id: int) -> bool:
+        user_ids, document_ids = await self.repository.dependent_ids([id])
+        success = await super().delete_object(id)
+        if success and user_ids:
+            await after_commit(lambda: self.invalidate_dependents(user_ids, document_ids))
+        return success
+
+    async def delete_objects(self, ids: List[int]) -> List[int]:
+        user_ids, document_ids = await self.repository.dependent_ids(ids)
+        deleted = await super().delete_objects(ids)
+        if deleted and user_ids:
+            await after_commit(lambda: self.invalidate_dependents(user_ids, document_ids))
+        return deleted
@@ -0,0 +1,151 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from repositories.uploads import UploadSessionRepository
+from storage.base import BlobStore
+from models.models import Document, UploadSession
+from db.db import unit_of_work, after_commit
+from config import settings, logger
+from .base import BaseService
+from .documents import DocumentService
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload offset is {offset}")
+        self.offset = offset
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadIncomplete(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is incomplete at offset {offset}")
+        self.offset = offset
+
+
+class UploadChecksumMismatch(Exception):
+    pass
+
+
+async def limit_stream(chunks: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLarge()
+        yield chunk
+
+
+class UploadService(BaseService):
+    """
+    Загрузка файла частями с возобновлением. Части сохраняются в хранилище
+    по мере поступления, сессия в БД хранит смещение и список частей.
+    Каждое обращение к БД выполняется в своей короткой единице работы (как и
+    проверка пользователя в get_current_user), поэтому соединение не держится,
+    пока принимается тело запроса.
+    """
+
+    def __init__(self, repository: UploadSessionRepository, document_service: DocumentService, blob_store: BlobStore):
+        super().__init__(repository)
+        self.document_service = document_service
+        self.blob_store = blob_store
+
+    @staticmethod
+    def expires_at() -> datetime:
+        return datetime.now() + timedelta(seconds=settings.upload_session_ttl)
+
+    async def create_upload(self, user_id: int, size: int, checksum: Optional[str] = None) -> UploadSession:
+        return await self.repository.create({
+            "key": uuid.uuid4().hex,
+            "user_id": user_id,
+            "size": size,
+            "offset": 0,
+            "checksum": checksum,
+            "parts": [],
+            "expires_at": self.expires_at(),
+        })
+
+    async def get_upload(self, key: str, user_id: int) -> Optional[UploadSession]:
+        upload = await self.repository.get_by_key(key)
+        if not upload or upload.user_id != user_id or upload.expires_at < datetime.now():
+            return None
+        return upload
+
+    async def append_chunk(self, key: str, user_id: int, offset: int, chunks: AsyncIterator[bytes]) -> Optional[UploadSession]:
+        async with unit_of_work():
+            upload = await self.get_upload(key, user_id)
+        if upload is None:
+            return None
+        if offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+
+        name = f"{upload.key}.{offset:016d}.{uuid.uuid4().hex[:8]}"
+        limit = min(upload.size - offset, settings.upload_max_chunk_size)
+        written = await self.blob_store.save_part(name, limit_stream(chunks, limit))
+        if not written:
+            await self.blob_store.delete_part(name)
+            return upload
+
+        async with unit_of_work():
+            advanced = await self.repository.advance(
+                upload.key, offset, [*upload.parts, name], written, self.expires_at()
+            )
+        if advanced is None:
+            await self.blob_store.delete_part(name)
+            async with unit_of_work():
+                current = await self.repository.get_by_key(key)
+            if current is None:
+                return None
+            raise UploadOffsetMismatch(current.offset)
+        return advanced
+
+    async def iter_parts(self, parts: List[str]) -> AsyncIterator[bytes]:
+        for name in parts:
+            async for chunk in self.blob_store.open_part(name):
+                yield chunk
+
+    async def discard_parts(self, parts: List[str]) -> None:
+        for name in parts:
+            try:
+                await self.blob_store.delete_part(name)
+            except Exception as e:
+                logger.error(f"Failed to delete upload part {name}: {e}")
+
+    async def complete_upload(self, key: str, user_id: int, data: Dict) -> Optional[Document]:
+        """Собирает части в объект хранилища и создаёт документ"""
+        async with unit_of_work():
+            upload = await self.get_upload(key, user_id)
+        if upload is None:
+            return None
+        if upload.offset != upload.size:
+            raise UploadIncomplete(upload.offset)
+
+        blob = await self.blob_store.save(self.iter_parts(upload.parts), claim=self.document_service.claim_file)
+        if upload.checksum and blob.checksum != upload.checksum:
+            raise UploadChecksumMismatch()
+        # сессию мог уже завершить параллельный запрос
+        if not await self.repository.delete_by_key(upload.key):
+            return None
+        document = await self.document_service.create_object({**data, **blob.to_dict()})
+        await after_commit(lambda: self.discard_parts(upload.parts))
+        return document
+
+    async def abort_upload(self, key: str, user_id: int) -> bool:
+        upload = await self.get_upload(key, user_id)
+        if upload is None or not await self.repository.delete_by_key(upload.key):
+            return False
+        await after_commit(lambda: self.discard_parts(upload.parts))
+        return True
+
+    async def collect_expired(self, limit: int = settings.blob_gc_batch_size) -> int:
+        keys = await self.repository.expired(datetime.now(), limit)
+        for key in keys:
+            async with unit_of_work():
+                upload = await self.repository.delete_by_key(key)
+            if upload is not None:
+                await self.discard_parts(upload.parts)
+        return len(keys)
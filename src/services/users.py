@@ -1,10 +1,58 @@
+from typing import Dict, List
+
 from repositories.users import UserRepository
 from .base import BaseService
 from models.models import User
+from auth.utils import hash_password_async, hash_passwords_async
+from cache.objects import ObjectCache
+from schemas.documents import DocumentInDB
+from db.db import after_commit
 
 class UserService(BaseService):
     def __init__(self, repository: UserRepository):
         super().__init__(repository)
+        self.document_cache = ObjectCache("documents", DocumentInDB)
 
     async def get_object_by_login(self, login: str) -> User:
         return await self.repository.get_by_name(login)
+
+    async def create_object(self, data: Dict) -> User:
+        if hasattr(data, "model_dump"):
+            data = data.model_dump()
+        data["password"] = await hash_password_async(data["password"])
+        return await super().create_object(data)
+
+    async def update_object(self, id: int, data: Dict) -> User:
+        if isinstance(data.get("password"), str):
+            data = {**data, "password": await hash_password_async(data["password"])}
+        return await super().update_object(id, data)
+
+    async def rehash_password(self, user: User, password: str) -> None:
+        await self.repository.update(user.id, {"password": await hash_password_async(password)})
+
+    async def create_objects(self, items: List[Dict]) -> List[User]:
+        hashes = await hash_passwords_async([item["password"] for item in items])
+        items = [{**item, "password": hashed} for item, hashed in zip(items, hashes)]
+        return await super().create_objects(items)
+
+    async def update_objects(self, items: List[Dict]) -> List[User]:
+        positions = [index for index, item in enumerate(items) if isinstance(item.get("password"), str)]
+        hashes = await hash_passwords_async([items[index]["password"] for index in positions])
+        items = list(items)
+        for index, hashed in zip(positions, hashes):
+            items[index] = {**items[index], "password": hashed}
+        return await super().update_objects(items)
+
+    async def delete_object(self, id: int) -> bool:
+        document_ids = await self.repository.document_ids([id])
+        success = await super().delete_object(id)
+        if success and document_ids:
+            await after_commit(lambda: self.document_cache.invalidate_many(document_ids))
+        return success
+
+    async def delete_objects(self, ids: List[int]) -> List[int]:
+        document_ids = await self.repository.document_ids(ids)
+        deleted = await super().delete_objects(ids)
+        if deleted and document_ids:
+            await after_commit(lambda: self.document_cache.invalidate_many(document_ids))
+        return deleted
@@ -0,0 +1,75 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from .codecs import decode_stream
+
+
+@dataclass
+class StoredBlob:
+    storage_key: str
+    size: int
+    checksum: str
+    codec: Optional[str] = None
+    stored_size: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class BlobStore(ABC):
+    """
+    Хранилище содержимого документов. Ключ объекта - sha256 содержимого,
+    поэтому одинаковые файлы хранятся в одном экземпляре.
+    """
+
+    @abstractmethod
+    async def save(
+        self,
+        chunks: AsyncIterator[bytes],
+        compress: bool = True,
+        claim: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> StoredBlob:
+        """
+        Метод потоковой записи содержимого в хранилище (со сжатием, если оно выгодно).
+        claim вызывается с ключом до проверки, есть ли уже такой объект, чтобы
+        сборщик мусора не удалил существующий объект, который будет переиспользован.
+        """
+        pass
+
+    @abstractmethod
+    def open_stored(self, key: str, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Метод чтения объекта в том виде, в котором он хранится (без распаковки)"""
+        pass
+
+    def open(self, key: str, start: int = 0, end: Optional[int] = None, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Метод потокового чтения исходного содержимого (end - включительно)"""
+        return decode_stream(self.open_stored(key, codec), codec, start, end)
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Метод удаления содержимого"""
+        pass
+
+    @abstractmethod
+    async def save_part(self, name: str, chunks: AsyncIterator[bytes]) -> int:
+        """Метод записи части незавершённой загрузки; возвращает число записанных байт"""
+        pass
+
+    @abstractmethod
+    def open_part(self, name: str) -> AsyncIterator[bytes]:
+        """Метод чтения части незавершённой загрузки"""
+        pass
+
+    @abstractmethod
+    async def delete_part(self, name: str) -> None:
+        """Метод удаления части незавершённой загрузки"""
+        pass
+
+    async def read(self, key: str, codec: Optional[str] = None) -> bytes:
+        return b"".join([chunk async for chunk in self.open(key, codec=codec)])
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Путь к файлу на диске, если хранилище файловое"""
+        return None
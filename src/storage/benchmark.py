@@ -0,0 +1,67 @@
+"""
+Оценка сжатия хранилища на наборе файлов: степень сжатия, скорость
+сжатия/распаковки и решение, которое примет выборочная проверка при записи.
+
+    python -m storage.benchmark /path/to/corpus --level 3
+"""
+import argparse
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from config import Settings, settings
+from .codecs import choose_codec, compression_enabled, zstandard, ZSTD
+
+
+def benchmark(paths, level: int):
+    compressor = zstandard.ZstdCompressor(level=level)
+    decompressor = zstandard.ZstdDecompressor()
+    totals = defaultdict(lambda: {"files": 0, "chosen": 0, "size": 0, "compressed": 0, "stored": 0,
+                                  "compress_time": 0.0, "decompress_time": 0.0})
+
+    for path in paths:
+        data = path.read_bytes()
+        start_time = time.perf_counter()
+        compressed = compressor.compress(data)
+        compress_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        decompressor.decompress(compressed)
+        decompress_time = time.perf_counter() - start_time
+        chosen = choose_codec(data[:settings.compression_sample_size]) == ZSTD
+
+        for group in (path.suffix.lower() or "<none>", "TOTAL"):
+            stats = totals[group]
+            stats["files"] += 1
+            stats["chosen"] += chosen
+            stats["size"] += len(data)
+            stats["compressed"] += len(compressed)
+            stats["stored"] += len(compressed) if chosen else len(data)
+            stats["compress_time"] += compress_time
+            stats["decompress_time"] += decompress_time
+    return totals
+
+
+def report(totals) -> None:
+    print(f"{'type':<10}{'files':>7}{'chosen':>8}{'size MiB':>11}{'ratio':>8}{'stored':>8}{'comp MB/s':>11}{'decomp MB/s':>13}")
+    for group, stats in sorted(totals.items(), key=lambda item: (item[0] == "TOTAL", item[0])):
+        size = stats["size"] or 1
+        megabytes = stats["size"] / 1e6
+        print(
+            f"{group:<10}{stats['files']:>7}{stats['chosen']:>8}"
+            f"{stats['size'] / 2 ** 20:>11.1f}"
+            f"{stats['compressed'] / size:>8.3f}"
+            f"{stats['stored'] / size:>8.3f}"
+            f"{megabytes / max(stats['compress_time'], 1e-9):>11.1f}"
+            f"{megabytes / max(stats['decompress_time'], 1e-9):>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure zstd ratio and throughput over a document corpus")
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--level", type=int, default=settings.compression_level)
+    args = parser.parse_args()
+    if not compression_enabled():
+        raise SystemExit("zstandard is not installed or STORAGE_COMPRESSION is disabled")
+    Settings.compression_level = args.level
+    report(benchmark([path for path in args.corpus.rglob("*") if path.is_file()], args.level))
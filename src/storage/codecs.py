@@ -0,0 +1,96 @@
+"""
+Сжатие содержимого в хранилище.
+
+Кодек выбирается при записи по первому фрагменту файла: если пробное сжатие
+не даёт заметного выигрыша (фото, видео, zip), файл хранится как есть.
+Ключ объекта по-прежнему sha256 исходного содержимого.
+"""
+import asyncio
+from typing import AsyncIterator, Optional, Tuple
+
+from config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD = "zstd"
+CODECS = (None, ZSTD)
+SUFFIXES = {None: "", ZSTD: ".zst"}
+
+
+def compression_enabled() -> bool:
+    return settings.storage_compression == ZSTD and zstandard is not None
+
+
+def choose_codec(sample: bytes) -> Optional[str]:
+    if not compression_enabled() or len(sample) < settings.compression_min_size:
+        return None
+    compressed = zstandard.ZstdCompressor(level=settings.compression_level).compress(sample)
+    if len(compressed) <= len(sample) * settings.compression_max_ratio:
+        return ZSTD
+    return None
+
+
+async def peek(chunks: AsyncIterator[bytes], size: int) -> Tuple[bytes, AsyncIterator[bytes]]:
+    """Читает начало потока и возвращает его вместе с потоком, начинающимся с начала"""
+    head = []
+    length = 0
+    async for chunk in chunks:
+        head.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+
+    async def rest():
+        for chunk in head:
+            yield chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return b"".join(head)[:size], rest()
+
+
+async def encode_stream(
+    chunks: AsyncIterator[bytes], compress: bool = True
+) -> Tuple[Optional[str], AsyncIterator[Tuple[bytes, bytes]]]:
+    """Возвращает выбранный кодек и поток пар (исходный фрагмент, записываемый фрагмент)"""
+    sample, chunks = await peek(chunks, settings.compression_sample_size)
+    codec = await asyncio.to_thread(choose_codec, sample) if compress else None
+
+    async def pairs():
+        if codec is None:
+            async for chunk in chunks:
+                yield chunk, chunk
+            return
+        compressor = zstandard.ZstdCompressor(level=settings.compression_level).compressobj()
+        async for chunk in chunks:
+            yield chunk, await asyncio.to_thread(compressor.compress, chunk)
+        yield b"", compressor.flush()
+
+    return codec, pairs()
+
+
+async def decode_stream(
+    chunks: AsyncIterator[bytes], codec: Optional[str], start: int = 0, end: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Потоковая распаковка с выдачей диапазона [start, end] исходного содержимого"""
+    if codec is not None and zstandard is None:
+        raise RuntimeError(f"zstandard package is required to read {codec} objects")
+    decompressor = zstandard.ZstdDecompressor().decompressobj() if codec else None
+    position = 0
+    async for chunk in chunks:
+        data = await asyncio.to_thread(decompressor.decompress, chunk) if decompressor else chunk
+        if not data:
+            continue
+        chunk_start, position = position, position + len(data)
+        if position <= start:
+            continue
+        data = data[max(start - chunk_start, 0):]
+        if end is not None and position > end + 1:
+            data = data[:len(data) - (position - end - 1)]
+        if data:
+            yield data
+        if end is not None and position > end:
+            break
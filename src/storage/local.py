@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from config import settings
+from .base import BlobStore, StoredBlob
+from .codecs import CODECS, SUFFIXES, encode_stream
+from .utils import read_file_range
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path, chunk_size: int = settings.upload_chunk_size):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.tmp_dir = self.root / "tmp"
+        self.parts_dir = self.root / "uploads"
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+    def path_for(self, key: str, codec: Optional[str] = None) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}{SUFFIXES[codec]}"
+
+    def find(self, key: str) -> Optional[Tuple[Optional[str], Path]]:
+        for codec in CODECS:
+            path = self.path_for(key, codec)
+            if path.exists():
+                return codec, path
+        return None
+
+    async def save(
+        self,
+        chunks: AsyncIterator[bytes],
+        compress: bool = True,
+        claim: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> StoredBlob:
+        tmp_path = self.tmp_dir / uuid.uuid4().hex
+        digest = hashlib.sha256()
+        size = 0
+        stored_size = 0
+        handle = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            codec, pairs = await encode_stream(chunks, compress)
+            async for chunk, encoded in pairs:
+                digest.update(chunk)
+                size += len(chunk)
+                stored_size += len(encoded)
+                await asyncio.to_thread(handle.write, encoded)
+            await asyncio.to_thread(handle.close)
+            key = digest.hexdigest()
+            if claim is not None:
+                await claim(key)
+            existing = await asyncio.to_thread(self.find, key)
+            if existing:
+                codec, path = existing
+                stored_size = path.stat().st_size
+                tmp_path.unlink()
+            else:
+                path = self.path_for(key, codec)
+                await asyncio.to_thread(os.makedirs, path.parent, exist_ok=True)
+                await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return StoredBlob(storage_key=key, size=size, checksum=key, codec=codec, stored_size=stored_size)
+
+    def open_stored(self, key: str, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        return read_file_range(self.path_for(key, codec), 0, None, self.chunk_size)
+
+    def open(self, key: str, start: int = 0, end: Optional[int] = None, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        if codec is None:
+            return read_file_range(self.path_for(key), start, end, self.chunk_size)
+        return super().open(key, start, end, codec)
+
+    async def save_part(self, name: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.parts_dir / name
+        written = 0
+        handle = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in chunks:
+                written += len(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+            await asyncio.to_thread(handle.close)
+        except BaseException:
+            handle.close()
+            path.unlink(missing_ok=True)
+            raise
+        return written
+
+    def open_part(self, name: str) -> AsyncIterator[bytes]:
+        return read_file_range(self.parts_dir / name, 0, None, self.chunk_size)
+
+    async def delete_part(self, name: str) -> None:
+        await asyncio.to_thread((self.parts_dir / name).unlink, missing_ok=True)
+
+    async def delete(self, key: str) -> None:
+        for codec in CODECS:
+            await asyncio.to_thread(self.path_for(key, codec).unlink, missing_ok=True)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self.path_for(key)
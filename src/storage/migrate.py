@@ -0,0 +1,62 @@
+"""
+Перенос содержимого документов из колонки documents.data в хранилище.
+
+    python -m storage.migrate --batch-size 50
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select, update
+
+from config import settings, logger
+from db.db import async_session_maker
+from depends import blob_store, document_service
+from models.models import Document
+from storage.utils import iter_bytes
+
+
+async def migrate_documents(batch_size: int = 50) -> int:
+    migrated = 0
+    last_id = 0
+    while True:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Document.id, Document.data)
+                .where(
+                    Document.id > last_id,
+                    Document.storage_key.is_(None),
+                    Document.data.is_not(None),
+                )
+                .order_by(Document.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            blobs = document_service.repository.blobs
+            for doc_id, data in rows:
+                blob = await blob_store.save(
+                    iter_bytes(data, settings.upload_chunk_size), claim=document_service.claim_file
+                )
+                # ссылки переносятся в той же транзакции, что и storage_key
+                await blobs.apply_documents(session, Document.id == doc_id, -1)
+                await session.execute(
+                    update(Document)
+                    .where(Document.id == doc_id)
+                    .values(data=None, **blob.to_dict())
+                )
+                await blobs.apply_documents(session, Document.id == doc_id, 1)
+                last_id = doc_id
+            await session.commit()
+
+        migrated += len(rows)
+        logger.info(f"Moved {migrated} documents to blob storage (last id {last_id})")
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move documents.data payloads to the blob store")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(migrate_documents(args.batch_size))
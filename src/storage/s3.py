@@ -0,0 +1,177 @@
+import hashlib
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+
+from config import settings
+from .base import BlobStore, StoredBlob
+from .codecs import CODECS, SUFFIXES, encode_stream
+
+# CopyObject копирует объекты не больше 5 ГБ, крупнее - только UploadPartCopy
+MAX_COPY_SIZE = 5 * 1024 * 1024 * 1024
+COPY_PART_SIZE = 512 * 1024 * 1024
+
+
+class S3BlobStore(BlobStore):
+    def __init__(
+        self,
+        bucket: str = settings.s3_bucket,
+        endpoint_url: str = settings.s3_endpoint_url,
+        access_key: str = settings.s3_access_key,
+        secret_key: str = settings.s3_secret_key,
+        region: str = settings.s3_region,
+        part_size: int = settings.s3_part_size,
+    ):
+        self.bucket = bucket
+        self.part_size = part_size
+        self.session = get_session()
+        self.client_kwargs = {
+            "endpoint_url": endpoint_url,
+            "aws_access_key_id": access_key,
+            "aws_secret_access_key": secret_key,
+            "region_name": region,
+        }
+
+    def client(self):
+        return self.session.create_client("s3", **self.client_kwargs)
+
+    @staticmethod
+    def object_key(key: str, codec: Optional[str] = None) -> str:
+        return f"{key[:2]}/{key[2:4]}/{key}{SUFFIXES[codec]}"
+
+    async def find(self, client, key: str) -> Optional[Tuple[Optional[str], int]]:
+        for codec in CODECS:
+            try:
+                head = await client.head_object(Bucket=self.bucket, Key=self.object_key(key, codec))
+                return codec, head["ContentLength"]
+            except ClientError:
+                continue
+        return None
+
+    async def save(
+        self,
+        chunks: AsyncIterator[bytes],
+        compress: bool = True,
+        claim: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> StoredBlob:
+        tmp_key = f"tmp/{uuid.uuid4().hex}"
+        digest = hashlib.sha256()
+        size = 0
+        codec, pairs = await encode_stream(chunks, compress)
+
+        async def encoded():
+            nonlocal size
+            async for chunk, data in pairs:
+                digest.update(chunk)
+                size += len(chunk)
+                yield data
+
+        async with self.client() as client:
+            stored_size = await self.upload(client, tmp_key, encoded())
+            key = digest.hexdigest()
+            try:
+                if claim is not None:
+                    await claim(key)
+                existing = await self.find(client, key)
+                if existing:
+                    codec, stored_size = existing
+                else:
+                    await self.copy(client, tmp_key, self.object_key(key, codec), stored_size)
+            finally:
+                await client.delete_object(Bucket=self.bucket, Key=tmp_key)
+        return StoredBlob(storage_key=key, size=size, checksum=key, codec=codec, stored_size=stored_size)
+
+    async def upload(self, client, object_key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Потоковая запись объекта multipart-загрузкой частями по part_size; возвращает размер"""
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=object_key)
+        upload_id = upload["UploadId"]
+        parts = []
+        buffer = bytearray()
+        written = 0
+
+        async def flush():
+            number = len(parts) + 1
+            part = await client.upload_part(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                PartNumber=number, Body=bytes(buffer),
+            )
+            parts.append({"ETag": part["ETag"], "PartNumber": number})
+            buffer.clear()
+
+        try:
+            async for chunk in chunks:
+                written += len(chunk)
+                buffer.extend(chunk)
+                if len(buffer) >= self.part_size:
+                    await flush()
+            if buffer or not parts:
+                await flush()
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+        return written
+
+    async def copy(self, client, source: str, target: str, size: int) -> None:
+        """Копирование внутри бакета; объекты больше MAX_COPY_SIZE копируются по частям"""
+        copy_source = {"Bucket": self.bucket, "Key": source}
+        if size <= MAX_COPY_SIZE:
+            await client.copy_object(Bucket=self.bucket, Key=target, CopySource=copy_source)
+            return
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=target)
+        upload_id = upload["UploadId"]
+        parts = []
+        try:
+            for number, first in enumerate(range(0, size, COPY_PART_SIZE), start=1):
+                last = min(first + COPY_PART_SIZE, size) - 1
+                part = await client.upload_part_copy(
+                    Bucket=self.bucket, Key=target, UploadId=upload_id, PartNumber=number,
+                    CopySource=copy_source, CopySourceRange=f"bytes={first}-{last}",
+                )
+                parts.append({"ETag": part["CopyPartResult"]["ETag"], "PartNumber": number})
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=target, UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=target, UploadId=upload_id)
+            raise
+
+    def open_stored(self, key: str, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        return self.get_object(self.object_key(key, codec))
+
+    def open(self, key: str, start: int = 0, end: Optional[int] = None, codec: Optional[str] = None) -> AsyncIterator[bytes]:
+        if codec is None:
+            return self.get_object(self.object_key(key), start, end)
+        return super().open(key, start, end, codec)
+
+    async def get_object(self, object_key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": object_key}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        async with self.client() as client:
+            response = await client.get_object(**params)
+            async with response["Body"] as body:
+                async for chunk in body.iter_chunks(settings.upload_chunk_size):
+                    yield chunk
+
+    async def save_part(self, name: str, chunks: AsyncIterator[bytes]) -> int:
+        async with self.client() as client:
+            return await self.upload(client, f"uploads/{name}", chunks)
+
+    def open_part(self, name: str) -> AsyncIterator[bytes]:
+        return self.get_object(f"uploads/{name}")
+
+    async def delete_part(self, name: str) -> None:
+        async with self.client() as client:
+            await client.delete_object(Bucket=self.bucket, Key=f"uploads/{name}")
+
+    async def delete(self, key: str) -> None:
+        async with self.client() as client:
+            for codec in CODECS:
+                await client.delete_object(Bucket=self.bucket, Key=self.object_key(key, codec))
@@ -0,0 +1,72 @@
+"""
+Миниатюры для галереи "Фотографии и Видео".
+
+Изображения уменьшаются через Pillow, для видео берётся кадр через ffmpeg.
+Обе зависимости необязательные: без них миниатюры соответствующего типа
+просто не создаются.
+"""
+import asyncio
+import io
+import mimetypes
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from config import settings, logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+FFMPEG = shutil.which("ffmpeg")
+
+THUMBNAIL_MEDIA_TYPE = "image/jpeg"
+
+
+def thumbnail_kind(file_name: str) -> Optional[str]:
+    media_type = mimetypes.guess_type(file_name)[0] or ""
+    if media_type.startswith("image/") and Image is not None:
+        return "image"
+    if media_type.startswith("video/") and FFMPEG is not None:
+        return "video"
+    return None
+
+
+def render_image(data: bytes, size: int = settings.thumbnail_size, quality: int = settings.thumbnail_quality) -> Optional[bytes]:
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft("RGB", (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=quality, optimize=True)
+            return output.getvalue()
+    except Exception as e:
+        logger.warning(f"Failed to render image thumbnail: {e}")
+        return None
+
+
+async def render_video_poster(path: Path, size: int = settings.thumbnail_size, quality: int = settings.thumbnail_quality) -> Optional[bytes]:
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG, "-nostdin", "-loglevel", "error",
+        "-i", str(path),
+        "-vf", f"thumbnail,scale={size}:{size}:force_original_aspect_ratio=decrease",
+        "-frames:v", "1",
+        # шкала mjpeg 2..31, где 2 - лучшее качество
+        "-q:v", str(max(2, min(31, 31 - quality * 29 // 100))),
+        "-f", "image2pipe", "-vcodec", "mjpeg", "pipe:1",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), settings.thumbnail_timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.warning(f"ffmpeg timed out rendering poster for {path.name}")
+        return None
+    if process.returncode != 0 or not stdout:
+        logger.warning(f"ffmpeg failed to render poster for {path.name}: {stderr.decode(errors='replace').strip()}")
+        return None
+    return stdout
@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from fastapi import UploadFile
+
+from config import settings
+
+
+async def iter_upload(file: UploadFile, chunk_size: int = settings.upload_chunk_size) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_bytes(data: bytes, chunk_size: int = settings.upload_chunk_size) -> AsyncIterator[bytes]:
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+async def write_file(path: Path, chunks: AsyncIterator[bytes]) -> None:
+    handle = await asyncio.to_thread(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(handle.write, chunk)
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+async def read_file_range(
+    path: Path,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: int = settings.upload_chunk_size,
+) -> AsyncIterator[bytes]:
+    handle = await asyncio.to_thread(open, path, "rb")
+    async for chunk in read_handle_range(handle, start, end, chunk_size):
+        yield chunk
+
+
+async def read_handle_range(
+    handle,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: int = settings.upload_chunk_size,
+) -> AsyncIterator[bytes]:
+    """Чтение диапазона из уже открытого файла; файл закрывается по окончании"""
+    try:
+        await asyncio.to_thread(handle.seek, start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await asyncio.to_thread(handle.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(handle.close)
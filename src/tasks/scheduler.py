@@ -0,0 +1,158 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from config import settings, logger
+from metrics.metrics import SCHEDULER_LEADER, SCHEDULER_JOB_DURATION, SCHEDULER_JOB_FAILURES
+
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLock:
+    """Блокировка в Redis (SET NX PX) с продлением и снятием только владельцем"""
+
+    def __init__(self, redis, key: str, ttl: float):
+        self.redis = redis
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid4().hex
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self.redis.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    async def release(self) -> None:
+        await self.redis.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable[None]]
+    interval: float
+    jitter: float = 0
+    timeout: Optional[float] = None
+
+
+class Scheduler:
+    """
+    Периодические задачи, выполняемые одним процессом на все воркеры и узлы.
+    Лидер выбирается по блокировке в Redis; время следующего запуска
+    хранится там же, поэтому смена лидера не сбивает расписание.
+    """
+
+    def __init__(self, jobs: List[Job], lock_ttl: float = settings.background_jobs.leader_lock_ttl, prefix: str = "scheduler"):
+        self.jobs = jobs
+        self.lock_ttl = lock_ttl
+        self.prefix = prefix
+        self.redis = None
+        self.leader_lock: Optional[RedisLock] = None
+        self.is_leader = False
+        self.task: Optional[asyncio.Task] = None
+        self.running: Dict[str, asyncio.Task] = {}
+
+    def key(self, *parts: str) -> str:
+        return ":".join((self.prefix, *parts))
+
+    async def elect(self) -> None:
+        if self.is_leader:
+            is_leader = await self.leader_lock.renew()
+        else:
+            is_leader = await self.leader_lock.acquire()
+        if is_leader != self.is_leader:
+            logger.info(f"Scheduler leadership {'acquired' if is_leader else 'lost'}")
+        self.is_leader = is_leader
+        SCHEDULER_LEADER.set(1 if is_leader else 0)
+
+    async def dispatch(self) -> None:
+        now = time.time()
+        for job in self.jobs:
+            if job.name in self.running:
+                continue
+            next_run = await self.redis.get(self.key("job", job.name, "next_run"))
+            if next_run is not None and float(next_run) > now:
+                continue
+            await self.redis.set(
+                self.key("job", job.name, "next_run"),
+                now + job.interval + random.uniform(0, job.jitter)
+            )
+            self.running[job.name] = asyncio.create_task(self.execute(job))
+
+    async def execute(self, job: Job) -> None:
+        timeout = job.timeout or job.interval
+        lock = RedisLock(self.redis, self.key("job", job.name, "lock"), timeout)
+        try:
+            if not await lock.acquire():
+                logger.warning(f"Job {job.name} is still running elsewhere, skipping")
+                return
+            start_time = time.perf_counter()
+            try:
+                await asyncio.wait_for(job.func(), timeout)
+                logger.info(f"Job {job.name} finished in {time.perf_counter() - start_time:.2f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                SCHEDULER_JOB_FAILURES.labels(job=job.name).inc()
+                logger.error(f"Job {job.name} failed: {e!r}")
+            finally:
+                SCHEDULER_JOB_DURATION.labels(job=job.name).observe(time.perf_counter() - start_time)
+                await lock.release()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.name} lock error: {e}")
+        finally:
+            self.running.pop(job.name, None)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.elect()
+                if self.is_leader:
+                    await self.dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler error: {e}")
+                self.is_leader = False
+                SCHEDULER_LEADER.set(0)
+            await asyncio.sleep(self.lock_ttl / 3)
+
+    def start(self, redis) -> None:
+        self.redis = redis
+        self.leader_lock = RedisLock(redis, self.key("leader"), self.lock_ttl)
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = list(self.running.values())
+        if self.task is not None:
+            tasks.append(self.task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+
+        if self.is_leader:
+            try:
+                await self.leader_lock.release()
+            except Exception as e:
+                logger.error(f"Failed to release scheduler lock: {e}")
+        self.is_leader = False
+        SCHEDULER_LEADER.set(0)
@@ -0,0 +1,21 @@
+"""
+Полный пересчёт таблицы documentdailystats по таблице documents.
+
+    python -m tasks.statistics
+"""
+import asyncio
+
+from config import logger
+from db.db import unit_of_work
+from repositories.statistics import DocumentStatsRepository
+
+
+async def rebuild_document_stats():
+    # единица работы: кэш статистики сбрасывается после коммита пересчёта
+    async with unit_of_work():
+        await DocumentStatsRepository().rebuild()
+    logger.info("Document daily statistics rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_document_stats())
@@ -1,12 +1,9 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
-
-import asyncio
-
 from metrics.metrics import update_metrics
 from db.db import async_session_maker
-from models.models import User, Document, Role, Patient
-from config import logger
+from config import settings, logger
+from tasks.scheduler import Job, Scheduler
+from tasks.statistics import rebuild_document_stats
+from depends import document_service, upload_service
 
 async def update_metrics_task():
     async with async_session_maker() as session:
@@ -18,18 +15,62 @@ async def update_metrics_task():
             logger.error(f"Metrics update error: {e}")
             raise
 
-async def scheduled_metrics_update():
-    while True:
-        try:
-            await update_metrics_task()
-            logger.info("Metrics updated successfully")
-        except Exception as e:
-            logger.error(f"Failed to update metrics: {str(e)}")
-        await asyncio.sleep(300)
+async def generate_thumbnails_task():
+    count = await document_service.generate_missing_thumbnails()
+    if count:
+        logger.info(f"Processed thumbnails for {count} documents")
+
+async def collect_unused_blobs_task():
+    count = await document_service.collect_unused_files()
+    if count:
+        logger.info(f"Collected {count} unused blobs")
+
+async def rebuild_blob_references_task():
+    await document_service.repository.blobs.rebuild()
+    logger.info("Blob reference counts rebuilt")
+
+async def collect_expired_uploads_task():
+    count = await upload_service.collect_expired()
+    if count:
+        logger.info(f"Removed {count} expired upload sessions")
 
-def start_metrics_task():
-    loop = asyncio.get_event_loop()
-    if loop.is_running():
-        loop.create_task(scheduled_metrics_update())
-    else:
-        loop.run_until_complete(scheduled_metrics_update())
\ No newline at end of file
+scheduler = Scheduler([
+    Job(
+        name="update_metrics",
+        func=update_metrics_task,
+        interval=settings.background_jobs.metrics_interval,
+        jitter=settings.background_jobs.metrics_jitter,
+    ),
+    Job(
+        name="rebuild_document_stats",
+        func=rebuild_document_stats,
+        interval=settings.background_jobs.document_stats_interval,
+        jitter=settings.background_jobs.document_stats_jitter,
+        timeout=3600,
+    ),
+    Job(
+        name="generate_thumbnails",
+        func=generate_thumbnails_task,
+        interval=settings.background_jobs.thumbnails_interval,
+        jitter=settings.background_jobs.thumbnails_jitter,
+    ),
+    Job(
+        name="collect_expired_uploads",
+        func=collect_expired_uploads_task,
+        interval=settings.background_jobs.upload_gc_interval,
+        jitter=settings.background_jobs.upload_gc_jitter,
+    ),
+    Job(
+        name="collect_unused_blobs",
+        func=collect_unused_blobs_task,
+        interval=settings.background_jobs.blob_gc_interval,
+        jitter=settings.background_jobs.blob_gc_jitter,
+    ),
+    Job(
+        name="rebuild_blob_references",
+        func=rebuild_blob_references_task,
+        interval=settings.background_jobs.document_stats_interval,
+        jitter=settings.background_jobs.document_stats_jitter,
+        timeout=3600,
+    ),
+])
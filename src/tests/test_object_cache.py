@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from fastapi_cache import FastAPICache
+from pydantic import BaseModel
+
+from cache.local import local_cache
+from cache.objects import ObjectCache
+from db.db import unit_of_work
+from services.patients import PatientService
+from services.roles import RoleService
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+class FakeRedis:
+    """Redis в памяти; каждая операция отдаёт управление, чтобы корутины перемежались"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        await asyncio.sleep(0)
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        await asyncio.sleep(0)
+        self.data[key] = value
+
+    async def incr(self, key):
+        await asyncio.sleep(0)
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(ObjectCache, "redis", property(lambda self: redis))
+    monkeypatch.setattr(FastAPICache, "get_prefix", lambda: "test")
+    local_cache.clear()
+    yield redis
+    local_cache.clear()
+
+
+def test_stale_read_does_not_outlive_concurrent_write():
+    cache = ObjectCache("items", Item)
+
+    async def scenario():
+        version, cached = await cache.get(1)
+        assert cached is None
+        await cache.write_through(Item(id=1, name="new"))
+        # чтение, начатое до записи, сохраняет значение под старой версией
+        await cache.set(1, version, Item(id=1, name="old"))
+        return await cache.get(1)
+
+    _, cached = asyncio.run(scenario())
+    assert cached is None
+
+
+def test_concurrent_writers_leave_the_latest_version():
+    cache = ObjectCache("items", Item)
+    rows = {}
+
+    async def read(obj_id):
+        version, cached = await cache.get(obj_id)
+        if cached is None:
+            cached = rows[obj_id]
+            await cache.set(obj_id, version, cached)
+        return cached
+
+    async def write(name):
+        await read(1)
+        rows[1] = Item(id=1, name=name)
+        # колбэки после коммита завершаются в произвольном порядке
+        for _ in range(int(name) % 3):
+            await asyncio.sleep(0)
+        await cache.write_through(rows[1])
+
+    async def scenario():
+        rows[1] = Item(id=1, name="initial")
+        await asyncio.gather(*(write(str(index)) for index in range(20)))
+        local_cache.clear()
+        return await read(1)
+
+    cached = asyncio.run(scenario())
+    assert Item.model_validate(cached) == rows[1]
+
+
+class FakePatientRepository:
+    async def document_ids(self, obj_ids):
+        return [10, 11]
+
+    async def delete(self, obj_id):
+        return True
+
+
+class FakeRoleRepository:
+    async def dependent_ids(self, obj_ids):
+        return [5], [10]
+
+    async def delete_many(self, obj_ids):
+        return list(obj_ids)
+
+
+def test_patient_delete_invalidates_cascaded_documents():
+    service = PatientService(FakePatientRepository())
+    service.document_cache = ObjectCache("documents", Item)
+
+    async def scenario():
+        await service.document_cache.write_through(Item(id=10, name="document"))
+        reader_version, _ = await service.document_cache.get(11)
+        async with unit_of_work():
+            assert await service.delete_object(1)
+            _, cached = await service.document_cache.get(10)
+            assert cached is not None
+        # параллельное чтение, начатое до удаления, кладёт значение уже после него
+        await service.document_cache.set(11, reader_version, Item(id=11, name="document"))
+        return [(await service.document_cache.get(obj_id))[1] for obj_id in (10, 11)]
+
+    assert asyncio.run(scenario()) == [None, None]
+
+
+def test_role_delete_invalidates_cascaded_users_and_documents():
+    service = RoleService(FakeRoleRepository())
+    service.user_cache = ObjectCache("users", Item)
+    service.document_cache = ObjectCache("documents", Item)
+
+    async def scenario():
+        await service.user_cache.write_through(Item(id=5, name="user"))
+        await service.document_cache.write_through(Item(id=10, name="document"))
+        async with unit_of_work():
+            assert await service.delete_objects([1]) == [1]
+        return (await service.user_cache.get(5))[1], (await service.document_cache.get(10))[1]
+
+    assert asyncio.run(scenario()) == (None, None)